@@ -3,12 +3,19 @@ import sys
 import os
 import importlib
 import importlib.util
+import traceback
+from functools import lru_cache
 from pathlib import Path
 
 # Add project root to Python path
 project_root = Path(__file__).parent.absolute()
 sys.path.insert(0, str(project_root))
 
+@lru_cache(maxsize=None)
+def _cached_find_spec(name, package=None):
+    """Memoized importlib.util.find_spec (module specs don't change within a run)."""
+    return importlib.util.find_spec(name, package)
+
 def check_import(module_name):
     """Check if a module can be imported."""
     print(f"\n{'='*80}")
@@ -17,7 +24,7 @@ def check_import(module_name):
     
     try:
         # Find the module spec
-        spec = importlib.util.find_spec(module_name)
+        spec = _cached_find_spec(module_name)
         if spec is None:
             print(f"❌ Could not find module: {module_name}")
             return False
@@ -45,7 +52,6 @@ def check_import(module_name):
         
     except Exception as e:
         print(f"❌ Error: {e}")
-        import traceback
         print("\nTraceback:")
         traceback.print_exc()
         return False
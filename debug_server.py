@@ -1,3 +1,4 @@
+import os
 import logging
 import uvicorn
 from kvopt.server.main import app
@@ -9,12 +10,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Opt in to uvicorn's auto-reloader with DEBUG_RELOAD=1 (re-imports the package on every change)
+DEBUG_RELOAD = os.getenv("DEBUG_RELOAD", "0") == "1"
+
 if __name__ == "__main__":
-    logger.info("Starting KV-OptKit server in debug mode...")
+    logger.info(f"Starting KV-OptKit server in debug mode (reload={DEBUG_RELOAD})...")
     uvicorn.run(
-        "kvopt.server.main:app",
+        # The reloader needs an import string; otherwise serve the already-imported app
+        "kvopt.server.main:app" if DEBUG_RELOAD else app,
         host="0.0.0.0",
         port=9000,
         log_level="debug",
-        reload=True
+        reload=DEBUG_RELOAD
     )
@@ -9,12 +9,15 @@ KV cache usage under HBM pressure. It shows how to:
 3. Monitor optimization decisions
 4. View before/after metrics
 """
-import time
+import asyncio
 import random
-import requests
+import httpx
 from typing import Any, Dict, List, Optional, Tuple
 from enum import Enum
-import json
+try:
+    from orjson import loads as _loads  # optional, faster JSON parsing
+except ImportError:  # pragma: no cover
+    from json import loads as _loads
 
 # Configuration
 BASE_URL = "http://localhost:8000"
@@ -23,6 +26,10 @@ SEQUENCES_ENDPOINT = f"{BASE_URL}/sequences"
 METRICS_ENDPOINT = f"{BASE_URL}/metrics"
 HEALTH_ENDPOINT = f"{BASE_URL}/health"
 
+# One client for the whole run; each poll tick needs two connections
+HTTP_LIMITS = httpx.Limits(max_connections=8, max_keepalive_connections=4)
+POLL_INTERVAL_S = 2.0
+
 class ActionType(str, Enum):
     EVICT = "evict"
     OFFLOAD = "offload"
@@ -43,12 +50,12 @@ def print_metrics(metrics: Dict[str, Any]) -> None:
     print(f"  • Sequences: {metrics.get('active_sequences', 0)} active")
     print(f"  • Memory Pressure: {metrics.get('memory_pressure', 0):.1%}")
 
-def get_metrics() -> Dict[str, Any]:
+async def get_metrics(client: httpx.AsyncClient) -> Dict[str, Any]:
     """Get current system metrics."""
     try:
-        response = requests.get(METRICS_ENDPOINT)
+        response = await client.get(METRICS_ENDPOINT)
         response.raise_for_status()
-        return response.json()
+        return _loads(response.content)
     except Exception as e:
         print(f"Error getting metrics from {METRICS_ENDPOINT}: {e}")
         # Return mock data for demo purposes
@@ -60,21 +67,26 @@ def get_metrics() -> Dict[str, Any]:
             "memory_pressure": 0.65
         }
 
-def submit_sequence(seq_id: str, length: int) -> bool:
-    """Submit a sequence to the system."""
+async def submit_sequences(client: httpx.AsyncClient, sequences: List[Tuple[str, int]]) -> List[Dict[str, Any]]:
+    """Submit a batch of sequences to the system in a single request.
+    
+    Returns one status entry per sequence with ``sequence_id``, ``length_tokens``
+    and ``accepted`` fields.
+    """
     try:
-        response = requests.post(
-            SEQUENCES_ENDPOINT,
-            json={"sequence_id": seq_id, "length_tokens": length}
+        response = await client.post(
+            f"{SEQUENCES_ENDPOINT}/batch",
+            json={"sequences": [{"sequence_id": s, "length_tokens": l} for s, l in sequences]}
         )
         response.raise_for_status()
-        return True
+        return _loads(response.content).get("results", [])
     except Exception as e:
-        print(f"Error submitting sequence {seq_id} to {SEQUENCES_ENDPOINT}: {e}")
+        print(f"Error submitting sequences to {SEQUENCES_ENDPOINT}/batch: {e}")
         print("Note: The sequences endpoint may not be implemented yet. Using mock submission.")
-        return True  # Return True to continue demo
+        # Mock acceptance to continue demo
+        return [{"sequence_id": s, "length_tokens": l, "accepted": True} for s, l in sequences]
 
-def enable_autopilot(dry_run: bool = True) -> bool:
+async def enable_autopilot(client: httpx.AsyncClient, dry_run: bool = True) -> bool:
     """Enable Autopilot with default configuration."""
     config = {
         "enabled": True,
@@ -91,7 +103,7 @@ def enable_autopilot(dry_run: bool = True) -> bool:
     }
     
     try:
-        response = requests.post(
+        response = await client.post(
             f"{AUTOPILOT_ENDPOINT}/config",
             json=config
         )
@@ -105,28 +117,32 @@ def enable_autopilot(dry_run: bool = True) -> bool:
         print("Note: The autopilot endpoint may not be implemented yet. Continuing with mock data.")
         return True  # Return True to continue demo
 
-def get_autopilot_status() -> Dict[str, Any]:
+async def get_autopilot_status(client: httpx.AsyncClient) -> Dict[str, Any]:
     """Get current Autopilot status."""
     try:
-        response = requests.get(f"{AUTOPILOT_ENDPOINT}/status")
+        response = await client.get(f"{AUTOPILOT_ENDPOINT}/status")
         response.raise_for_status()
-        return response.json()
+        return _loads(response.content)
     except Exception as e:
         print(f"Error getting Autopilot status: {e}")
         return {}
 
-def generate_workload(num_sequences: int = 10) -> List[Tuple[str, int]]:
-    """Generate a realistic workload of sequences."""
+def generate_workload(num_sequences: int = 10, seed: Optional[int] = None) -> List[Tuple[str, int]]:
+    """Generate a realistic workload of sequences.
+    
+    Pass ``seed`` to get a reproducible workload.
+    """
+    rng = random.Random(seed)
     sequences = []
     for i in range(1, num_sequences + 1):
         seq_id = f"seq_{i:03d}"
         # Vary sequence lengths between 100-2000 tokens
-        length = random.randint(100, 2000)
+        length = rng.randint(100, 2000)
         sequences.append((seq_id, length))
     return sequences
 
-def run_demo() -> None:
-    """Run the Autopilot demo."""
+async def run_demo_async(client: httpx.AsyncClient) -> None:
+    """Run the Autopilot demo against the given HTTP client."""
     print_header("KV-OptKit Autopilot Demo")
     print("This demo will:")
     print("1. Submit a workload of sequences")
@@ -136,25 +152,25 @@ def run_demo() -> None:
     
     # Initial metrics
     print_header("Initial State")
-    initial_metrics = get_metrics()
+    initial_metrics = await get_metrics(client)
     print_metrics(initial_metrics)
     
     # Submit workload
     print_header("Submitting Workload")
     sequences = generate_workload(num_sequences=15)
-    for seq_id, length in sequences:
-        if submit_sequence(seq_id, length):
-            print(f"✅ Submitted sequence {seq_id} ({length} tokens)")
+    for item in await submit_sequences(client, sequences):
+        if item.get("accepted"):
+            print(f"✅ Submitted sequence {item['sequence_id']} ({item['length_tokens']} tokens)")
     
     # Show metrics after workload
-    time.sleep(2)  # Give system time to process
+    await asyncio.sleep(POLL_INTERVAL_S)  # Give system time to process
     print_header("After Workload Submission")
-    workload_metrics = get_metrics()
+    workload_metrics = await get_metrics(client)
     print_metrics(workload_metrics)
     
     # Enable Autopilot
     print_header("Enabling Autopilot")
-    if not enable_autopilot(dry_run=True):
+    if not await enable_autopilot(client, dry_run=True):
         print("❌ Cannot continue without Autopilot")
         return
     
@@ -163,18 +179,22 @@ def run_demo() -> None:
     print("Autopilot is analyzing and making optimization decisions...")
     
     for _ in range(5):  # Check status 5 times
-        status = get_autopilot_status()
+        # Fetch status and metrics for this tick concurrently
+        status, metrics = await asyncio.gather(
+            get_autopilot_status(client), get_metrics(client)
+        )
         if status.get("enabled"):
             print(f"\nAutopilot Status:")
             print(f"  • State: {status.get('state', 'unknown')}")
             print(f"  • Active Plan: {status.get('active_plan', 'None')}")
             print(f"  • Optimizations Applied: {status.get('optimizations_applied', 0)}")
             print(f"  • HBM Saved: {status.get('hbm_saved_gb', 0):.2f}GB")
-        time.sleep(2)
+        print_metrics(metrics)
+        await asyncio.sleep(POLL_INTERVAL_S)
     
     # Final metrics
     print_header("Final Metrics")
-    final_metrics = get_metrics()
+    final_metrics = await get_metrics(client)
     print_metrics(final_metrics)
     
     # Show before/after comparison
@@ -197,5 +217,14 @@ def run_demo() -> None:
     
     print("\n✅ Demo complete!")
 
+async def _main() -> None:
+    headers = {"Content-Type": "application/json"}
+    async with httpx.AsyncClient(headers=headers, limits=HTTP_LIMITS) as client:
+        await run_demo_async(client)
+
+def run_demo() -> None:
+    """Run the Autopilot demo."""
+    asyncio.run(_main())
+
 if __name__ == "__main__":
     run_demo()
@@ -5,12 +5,12 @@ This script demonstrates KV cache memory savings using the KIVI quantization plu
 It shows the reduction in memory usage when applying different quantization levels.
 """
 import time
-import random
 import numpy as np
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 import argparse
 import logging
 import csv
+from collections import defaultdict
 from pathlib import Path
 from datetime import datetime
 import sys
@@ -29,60 +29,137 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 logger.setLevel(log_level)
 
-from kvopt.plugins.kivi_plugin import KIVIPlugin, KIVIConfig
-import inspect
+from kvopt.plugins.kivi_plugin import KIVIPlugin
+
+# Resolved once at import for the debug log in run_demo
+_KIVI_SRC = getattr(sys.modules.get(KIVIPlugin.__module__), '__file__', KIVIPlugin.__module__)
+
+KV_SAVINGS_CSV = Path("outputs") / "kv_savings.csv"
 
 class MockKVStore:
     """Mock KV store that simulates a high-bandwidth memory cache."""
     
+    # Per quantized entry: scale and zero_point (4 bytes each) + metadata (dtype, shape, etc.)
+    _QUANT_METADATA_BYTES = 8 + 32
+    
     def __init__(self, num_layers: int = 32, hidden_size: int = 4096, num_heads: int = 32):
         self.num_layers = num_layers
         self.hidden_size = hidden_size
         self.num_heads = num_heads
         self.head_dim = hidden_size // num_heads
-        self.kv_cache = {}
+        self.kv_cache: Dict[int, Dict[str, Any]] = defaultdict(dict)
         self.quant_plugin = None
+        self.rng = np.random.default_rng()
+        # Running byte totals per layer, maintained on every write to kv_cache
+        self._byte_totals: Dict[int, int] = defaultdict(int)
+        # Backing buffer for bulk-generated KV tensors, refilled in place when reused
+        self._kv_buffer: Optional[np.ndarray] = None
         
     def generate_kv_cache(self, seq_length: int) -> Dict[str, np.ndarray]:
         """Generate mock KV cache for a sequence."""
-        # Generate random key and value tensors
-        k = np.random.randn(seq_length, self.num_heads, self.head_dim).astype(np.float32)
-        v = np.random.randn(seq_length, self.num_heads, self.head_dim).astype(np.float32)
-        return {'k': k, 'v': v}
+        # Generate random key and value tensors directly in float32
+        kv = self.rng.standard_normal(
+            size=(2, seq_length, self.num_heads, self.head_dim), dtype=np.float32
+        )
+        return {'k': kv[0], 'v': kv[1]}
+    
+    def generate_kv_cache_bulk(
+        self, num_sequences: int, num_layers: int, seq_length: int, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Generate KV tensors for all sequences and layers with a single RNG call.
+        
+        Returns an array shaped (num_sequences, num_layers, 2, seq_length, num_heads, head_dim)
+        where index 0/1 on the third axis holds keys/values. A matching float32 ``out``
+        buffer is filled in place instead of allocating a new array.
+        """
+        shape = (num_sequences, num_layers, 2, seq_length, self.num_heads, self.head_dim)
+        if out is None or out.shape != shape or out.dtype != np.float32:
+            out = np.empty(shape, dtype=np.float32)
+        self.rng.standard_normal(dtype=np.float32, out=out)
+        return out
+    
+    def store_sequences_bulk(self, num_sequences: int, seq_length: int, num_layers: int):
+        """Store all sequences across all layers as views into one bulk tensor."""
+        big = self.generate_kv_cache_bulk(num_sequences, num_layers, seq_length, out=self._kv_buffer)
+        self._kv_buffer = big
+        for layer_idx in range(num_layers):
+            for s in range(num_sequences):
+                self.set_kv(layer_idx, f"seq_{s:03d}", {'k': big[s, layer_idx, 0], 'v': big[s, layer_idx, 1]})
     
     def store_sequence(self, seq_id: str, seq_length: int, layer_idx: int = 0):
         """Store a sequence's KV cache in the store."""
-        if layer_idx not in self.kv_cache:
-            self.kv_cache[layer_idx] = {}
-        
-        self.kv_cache[layer_idx][seq_id] = self.generate_kv_cache(seq_length)
+        self.set_kv(layer_idx, seq_id, self.generate_kv_cache(seq_length))
+    
+    def set_kv(self, layer_idx: int, seq_id: str, kv: Dict[str, Any]):
+        """Write a sequence's KV entries for a layer and update the byte totals."""
+        layer_cache = self.kv_cache[layer_idx]
+        delta = self._kv_bytes(kv)
+        if seq_id in layer_cache:
+            delta -= self._kv_bytes(layer_cache[seq_id])
+        layer_cache[seq_id] = kv
+        self._byte_totals[layer_idx] += delta
+    
+    @staticmethod
+    def _entry_bytes(entry: Any) -> int:
+        """Memory footprint of a single key or value entry."""
+        if isinstance(entry, dict) and 'data' in entry:
+            # Handle quantized data using per-entry bitwidth
+            bitwidth = int(entry.get('bitwidth', 8))
+            num_elements = int(entry['data'].size)
+            quantized_bytes = (num_elements * bitwidth + 7) // 8  # Round up to nearest byte
+            return quantized_bytes + MockKVStore._QUANT_METADATA_BYTES
+        if hasattr(entry, 'nbytes'):
+            # Handle regular numpy arrays (assuming float32)
+            return entry.nbytes
+        return 0
+    
+    @classmethod
+    def _kv_bytes(cls, kv: Dict[str, Any]) -> int:
+        """Memory footprint of both key and value tensors of a sequence."""
+        return sum(cls._entry_bytes(v) for v in kv.values())
     
     def get_memory_usage(self) -> Tuple[int, Dict]:
-        """Calculate memory usage in bytes and per-layer breakdown."""
-        total_bytes = 0
-        layer_breakdown = {}
-        
-        for layer_idx, layer_cache in self.kv_cache.items():
-            layer_bytes = 0
-            for seq_id, kv in layer_cache.items():
-                # Calculate memory for both key and value tensors
-                for k, v in kv.items():
-                    if isinstance(v, dict) and 'data' in v:
-                        # Handle quantized data using per-entry bitwidth
-                        bitwidth = int(v.get('bitwidth', 8))
-                        num_elements = int(v['data'].size)
-                        quantized_bytes = (num_elements * bitwidth + 7) // 8  # Round up to nearest byte
-                        layer_bytes += quantized_bytes
-                        layer_bytes += 8  # scale and zero_point (4 bytes each)
-                        layer_bytes += 32  # metadata (dtype, shape, etc.)
-                    elif hasattr(v, 'nbytes'):
-                        # Handle regular numpy arrays (assuming float32)
-                        layer_bytes += v.nbytes
-            
-            layer_breakdown[layer_idx] = layer_bytes
-            total_bytes += layer_bytes
-            
-        return total_bytes, layer_breakdown
+        """Return memory usage in bytes and per-layer breakdown."""
+        return sum(self._byte_totals.values()), dict(self._byte_totals)
+
+class AccuracyAccumulator:
+    """Per-pair MSE and cosine reductions for (dequantized, original) tensors.
+    
+    Each pair is reduced as soon as it is added, so only the scalar results are
+    kept; the final cosine and sums are computed over the filled slots at once.
+    """
+    
+    def __init__(self, capacity: int):
+        self.count = 0
+        self._sq_err = np.empty(capacity, dtype=np.float64)
+        self._size = np.empty(capacity, dtype=np.float64)
+        self._dot = np.empty(capacity, dtype=np.float64)
+        self._nd = np.empty(capacity, dtype=np.float64)
+        self._no = np.empty(capacity, dtype=np.float64)
+    
+    def add(self, deq: np.ndarray, orig: np.ndarray) -> None:
+        i = self.count
+        d = deq.ravel()
+        o = orig.ravel()
+        diff = d - o
+        self._sq_err[i] = np.vdot(diff, diff)
+        self._size[i] = d.size
+        self._dot[i] = np.vdot(d, o)
+        self._nd[i] = np.vdot(d, d)
+        self._no[i] = np.vdot(o, o)
+        self.count = i + 1
+    
+    def sums(self) -> Tuple[float, float]:
+        """Return summed MSE and cosine similarity over the added pairs."""
+        n = self.count
+        if not n:
+            return 0.0, 0.0
+        mse = self._sq_err[:n] / self._size[:n]
+        dot = self._dot[:n]
+        denom = np.sqrt(self._nd[:n]) * np.sqrt(self._no[:n])
+        # Zero-norm pairs are treated as identical (cosine 1.0)
+        cos = np.divide(dot, denom, out=np.ones_like(dot), where=denom != 0)
+        return float(mse.sum()), float(cos.sum())
 
 def run_demo(
     num_sequences: int = 10,
@@ -96,18 +173,16 @@ def run_demo(
     # Initialize mock KV store
     kv_store = MockKVStore(num_layers=num_layers)
     
-    # Generate test sequences
-    for i in range(num_sequences):
-        seq_id = f"seq_{i:03d}"
-        # Store sequence in all layers
-        for layer_idx in range(num_layers):
-            kv_store.store_sequence(seq_id, seq_length, layer_idx)
+    # Generate test sequences for all layers in one bulk allocation
+    kv_store.store_sequences_bulk(num_sequences, seq_length, num_layers)
     
     # Get baseline memory usage
     baseline_mem, _ = kv_store.get_memory_usage()
     logger.info(f"Baseline memory usage: {baseline_mem / (1024**2):.2f} MB")
     
     results = []
+    # All rows from this run share one timestamp
+    run_ts = datetime.now().isoformat()
     
     # Test different bitwidths
     for bitwidth in bitwidths:
@@ -129,33 +204,35 @@ def run_demo(
         plugin = KIVIPlugin(config)
         plugin.on_startup()
         # Debug: verify which KIVIPlugin file is loaded
-        try:
-            plugin_src = inspect.getsourcefile(KIVIPlugin)
-            logger.debug(f"KIVIPlugin loaded from: {plugin_src}")
-        except Exception:
-            pass
+        logger.debug(f"KIVIPlugin loaded from: {_KIVI_SRC}")
         
+        # Quantize into a scratch store so kv_store keeps the pristine float32
+        # originals and every bitwidth is measured against the same baseline
+        quant_store = MockKVStore(num_layers=num_layers)
         # Store reference to the plugin in the KV store for memory calculation
-        kv_store.quant_plugin = plugin
+        quant_store.quant_plugin = plugin
         
         # Apply quantization to all layers
         start_time = time.time()
         total_quantized = 0
         
-        logger.debug(f"Applying quantization to {len(kv_store.kv_cache)} layers")
-        # Accumulators for accuracy proxies
-        sum_mse_k = 0.0
-        sum_mse_v = 0.0
-        sum_cos_k = 0.0
-        sum_cos_v = 0.0
-        count_acc = 0
+        # Resolve the debug level once; hot-path debug payloads are only built when enabled
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug(f"Applying quantization to {len(kv_store.kv_cache)} layers")
+        # Accuracy proxies reduced pair by pair; no dequantized tensors are retained
+        num_pairs = sum(len(layer_cache) for layer_cache in kv_store.kv_cache.values())
+        acc_k = AccuracyAccumulator(num_pairs)
+        acc_v = AccuracyAccumulator(num_pairs)
 
         for layer_idx, layer_cache in kv_store.kv_cache.items():
-            logger.debug(f"Processing layer {layer_idx} with {len(layer_cache)} sequences")
+            if debug_enabled:
+                logger.debug(f"Processing layer {layer_idx} with {len(layer_cache)} sequences")
             for seq_id, kv in layer_cache.items():
                 # Log original data shape and size
-                orig_size = sum(v.nbytes if hasattr(v, 'nbytes') else len(str(v).encode()) for v in kv.values())
-                logger.debug(f"  Seq {seq_id}: Original size: {orig_size} bytes")
+                if debug_enabled:
+                    orig_size = sum(v.nbytes if hasattr(v, 'nbytes') else len(str(v).encode()) for v in kv.values())
+                    logger.debug(f"  Seq {seq_id}: Original size: {orig_size} bytes")
                 
                 # Apply quantization with layer index and token position
                 # Use seq_length as token_pos since we want to quantize all tokens
@@ -165,54 +242,44 @@ def run_demo(
                 try:
                     if quantized_kv is not kv:
                         deq = plugin.dequantize(quantized_kv, layer_idx=layer_idx, token_pos=seq_length)
-                        # MSE
-                        mse_k = float(np.mean((deq['k'].astype(np.float32) - kv['k'].astype(np.float32)) ** 2))
-                        mse_v = float(np.mean((deq['v'].astype(np.float32) - kv['v'].astype(np.float32)) ** 2))
-                        # Cosine similarity
-                        def cos(a: np.ndarray, b: np.ndarray) -> float:
-                            a_f = a.reshape(-1).astype(np.float32)
-                            b_f = b.reshape(-1).astype(np.float32)
-                            denom = (np.linalg.norm(a_f) * np.linalg.norm(b_f))
-                            if denom == 0:
-                                return 1.0
-                            return float(np.dot(a_f, b_f) / denom)
-                        cos_k = cos(deq['k'], kv['k'])
-                        cos_v = cos(deq['v'], kv['v'])
-                        sum_mse_k += mse_k
-                        sum_mse_v += mse_v
-                        sum_cos_k += cos_k
-                        sum_cos_v += cos_v
-                        count_acc += 1
+                        # copy=False makes the cast a no-op for tensors that are already float32
+                        acc_k.add(deq['k'].astype(np.float32, copy=False), kv['k'].astype(np.float32, copy=False))
+                        acc_v.add(deq['v'].astype(np.float32, copy=False), kv['v'].astype(np.float32, copy=False))
+                        del deq
                 except Exception as _e:
                     # Non-fatal: continue
                     logger.debug(f"  Seq {seq_id}: accuracy proxy failed: {_e}")
                 # Sanity check: ensure plugin returned dict-wrapped quantized entries
-                try:
-                    k_type = type(quantized_kv.get('k')).__name__
-                    v_type = type(quantized_kv.get('v')).__name__
-                    logger.debug(f"  Seq {seq_id}: types after quantize -> k: {k_type}, v: {v_type}")
-                except Exception:
-                    pass
+                if debug_enabled:
+                    try:
+                        k_type = type(quantized_kv.get('k')).__name__
+                        v_type = type(quantized_kv.get('v')).__name__
+                        logger.debug(f"  Seq {seq_id}: types after quantize -> k: {k_type}, v: {v_type}")
+                    except Exception:
+                        pass
                 
                 # Log quantized data size
-                if quantized_kv is not kv:  # If quantization was applied
-                    def q_bytes(entry):
-                        if isinstance(entry, dict) and 'data' in entry:
-                            bitwidth = entry.get('bitwidth', 8)
-                            numel = entry['data'].size
-                            data_bytes = (numel * bitwidth + 7) // 8
-                            return data_bytes + 8 + 32
-                        return entry.nbytes if hasattr(entry, 'nbytes') else len(str(entry).encode())
-
-                    quant_size = sum(q_bytes(v) for v in quantized_kv.values())
+                if debug_enabled and quantized_kv is not kv:  # If quantization was applied
+                    qk = quantized_kv['k']
+                    qv = quantized_kv['v']
+                    # Packed k/v data plus per-entry quantization metadata
+                    quant_size = (
+                        ((qk['data'].size + qv['data'].size) * bitwidth + 7) // 8
+                        + 2 * MockKVStore._QUANT_METADATA_BYTES
+                    )
                     logger.debug(f"  Seq {seq_id}: Quantized size: {quant_size} bytes")
                 
-                # Replace with quantized version
-                layer_cache[seq_id] = quantized_kv
+                # Record quantized version without touching the originals
+                quant_store.set_kv(layer_idx, seq_id, quantized_kv)
                 total_quantized += 1
         
+        # Finish the accuracy proxies for all sequences in one vectorized pass
+        count_acc = acc_k.count
+        sum_mse_k, sum_cos_k = acc_k.sums()
+        sum_mse_v, sum_cos_v = acc_v.sums()
+        
         # Get memory usage after quantization
-        quantized_mem, _ = kv_store.get_memory_usage()
+        quantized_mem, _ = quant_store.get_memory_usage()
         
         # Calculate metrics
         compression_ratio = baseline_mem / quantized_mem if quantized_mem > 0 else 1.0
@@ -236,7 +303,7 @@ def run_demo(
             'num_sequences': num_sequences,
             'seq_length': seq_length,
             'num_layers': num_layers,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': run_ts
         }
         results.append(result)
         
@@ -257,28 +324,24 @@ def run_demo(
     
     # Save results to CSV
     save_results_to_csv(results)
-    print(f"\nDetailed results saved to: outputs/kv_savings.csv")
+    print(f"\nDetailed results saved to: {KV_SAVINGS_CSV}")
 
-def save_results_to_csv(results: List[Dict], filename: str = "outputs/kv_savings.csv"):
+def save_results_to_csv(results: List[Dict], filename: Path = KV_SAVINGS_CSV):
     """Save quantization results to a CSV file."""
     if not results:
         return
     
     # Create outputs directory if it doesn't exist
-    output_dir = Path("outputs")
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Use a fixed filename for simplicity
-    filename = "kv_savings.csv"
-    
-    # Prepare CSV data
-    file_exists = output_dir.joinpath(filename).exists()
+    path = Path(filename)
+    path.parent.mkdir(parents=True, exist_ok=True)
     
-    with open(output_dir / filename, 'a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=results[0].keys())
-        if not file_exists:
-            writer.writeheader()
-        writer.writerows(results)
+    fieldnames = list(results[0].keys())
+    with open(path, 'a', newline='') as f:
+        writer = csv.writer(f)
+        # Append mode positions at EOF, so an empty file needs a header
+        if f.tell() == 0:
+            writer.writerow(fieldnames)
+        writer.writerows([r[k] for k in fieldnames] for r in results)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='KV Quantization Demo')
@@ -4,10 +4,10 @@ LMCache Reuse Demo
 This script demonstrates KV cache reuse using the LMCache plugin.
 It shows the performance improvement when the same sequences are processed multiple times.
 """
+import atexit
 import time
-import random
 import numpy as np
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import argparse
 import logging
 import csv
@@ -24,82 +24,273 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from kvopt.plugins.lmcache_plugin import LMCachePlugin
 
+# Shared generator for token sampling
+_RNG = np.random.default_rng()
+_OUTPUT_DIR = Path("outputs")
+
+def _to_kv_dtype(x: np.ndarray, dtype: str) -> np.ndarray:
+    """Convert float32 draws to the storage format for a KV dtype name."""
+    if dtype == "fp32":
+        return x
+    if dtype == "fp16":
+        return x.astype(np.float16)
+    if dtype == "bf16":
+        # NumPy has no bfloat16; keep the upper 16 bits of each float32 as uint16
+        return (x.view(np.uint32) >> 16).astype(np.uint16)
+    if dtype == "int8":
+        return np.clip(np.round(x * 32.0), -128, 127).astype(np.int8)
+    raise ValueError(f"Unsupported KV dtype: {dtype}")
+
 class MockLLM:
     """Mock LLM that simulates KV cache generation."""
     
-    def __init__(self, cache_plugin: LMCachePlugin = None):
+    hidden_size = 4096  # Example hidden size
+    num_heads = 32     # Example number of attention heads
+    head_dim = hidden_size // num_heads
+    
+    def __init__(self, cache_plugin: LMCachePlugin = None, fast_mode: bool = False, kv_dtype: str = "fp16",
+                 arena_tokens: int = 0):
         self.cache = cache_plugin
+        # Storage precision for generated K/V (fp32, fp16, bf16 or int8)
+        self.kv_dtype = kv_dtype
         self.generation_time = 0.01  # seconds per token
+        # In fast mode generation cost is accumulated here instead of slept
+        self.fast_mode = fast_mode
+        self._simulated_ns = 0
+        # Per-instance SFC64 generator (faster than the legacy global MT19937 state)
+        self._rng = np.random.default_rng(np.random.SFC64())
+        # Contiguous K/V arenas; generated caches are views into them (see _acquire_kv)
+        self._k_arena: Optional[np.ndarray] = None
+        self._v_arena: Optional[np.ndarray] = None
+        self._arena_used = 0
+        if arena_tokens:
+            self._grow_arena(arena_tokens)
+    
+    def _draw_kv(self, num_tokens: int) -> np.ndarray:
+        """Draw num_tokens rows of random K or V data in the storage dtype."""
+        shape = (num_tokens, self.num_heads, self.head_dim)
+        return _to_kv_dtype(self._rng.standard_normal(shape, dtype=np.float32), self.kv_dtype)
+    
+    def _grow_arena(self, min_tokens: int) -> None:
+        """Grow the K/V arenas geometrically (1.5x) to hold at least min_tokens rows."""
+        old = 0 if self._k_arena is None else self._k_arena.shape[0]
+        fresh = max(min_tokens, int(old * 1.5)) - old
+        # Only the new tail is drawn; views handed out earlier keep the old arrays alive
+        if self._k_arena is None:
+            self._k_arena, self._v_arena = self._draw_kv(fresh), self._draw_kv(fresh)
+        else:
+            self._k_arena = np.concatenate([self._k_arena, self._draw_kv(fresh)])
+            self._v_arena = np.concatenate([self._v_arena, self._draw_kv(fresh)])
+    
+    def _acquire_kv(self, num_tokens: int) -> Dict[str, np.ndarray]:
+        """Hand out K/V views for num_tokens rows of the arenas.
         
-    def generate(self, sequence_id: str, tokens: List[int]) -> Dict[str, Any]:
+        The arenas are rewound at the start of every generate/generate_batch call, so
+        returned caches are only valid until then; copy them to keep them longer.
+        """
+        start, end = self._arena_used, self._arena_used + num_tokens
+        if self._k_arena is None or end > self._k_arena.shape[0]:
+            self._grow_arena(end)
+        self._arena_used = end
+        return {'k': self._k_arena[start:end], 'v': self._v_arena[start:end]}
+    
+    @property
+    def simulated_seconds(self) -> float:
+        """Total generation cost accrued in fast mode."""
+        return self._simulated_ns / 1e9
+    
+    def _simulate_generation(self, num_tokens: int) -> None:
+        """Pay (or, in fast mode, account for) the cost of generating num_tokens."""
+        if self.fast_mode:
+            self._simulated_ns += int(self.generation_time * num_tokens * 1e9)
+        else:
+            time.sleep(self.generation_time * num_tokens)
+    
+    def _build_kv(self, sequence_id: str, tokens: List[int]) -> Dict[str, Any]:
+        """Generate mock KV cache backed by the K/V arenas."""
+        return {
+            **self._acquire_kv(len(tokens)),
+            'sequence_id': sequence_id,
+            'tokens': tokens.copy(),
+            'dtype': self.kv_dtype
+        }
+    
+    def generate_batch(self, sequence_ids: List[str], tokens_list: List[List[int]],
+                       cache_keys: Optional[List[Optional[str]]] = None) -> List[Dict[str, Any]]:
+        """Generate KV caches for several sequences with one cache lookup and one cache write."""
+        self._arena_used = 0
+        if self.cache:
+            results = self.cache.check_cache_batch(sequence_ids, tokens_list, precomputed_keys=cache_keys)
+        else:
+            results = [None] * len(tokens_list)
+        
+        misses = []
+        for i, cached in enumerate(results):
+            if cached:
+                logger.info(f"Cache HIT for sequence {sequence_ids[i]}")
+            else:
+                misses.append(i)
+        
+        # Generate all misses together
+        self._simulate_generation(sum(len(tokens_list[i]) for i in misses))
+        for i in misses:
+            results[i] = self._build_kv(sequence_ids[i], tokens_list[i])
+        
+        if self.cache and misses:
+            self.cache.update_cache_batch(
+                [sequence_ids[i] for i in misses],
+                [tokens_list[i] for i in misses],
+                [results[i] for i in misses],
+                precomputed_keys=[cache_keys[i] for i in misses] if cache_keys else None,
+            )
+        return results
+    
+    def generate(self, sequence_id: str, tokens: List[int], cache_key: Optional[str] = None) -> Dict[str, Any]:
         """Generate KV cache for a sequence."""
+        self._arena_used = 0
         # Check cache first
         if self.cache:
-            cached = self.cache.check_cache(sequence_id, tokens)
+            cached = self.cache.check_cache(sequence_id, tokens, precomputed_key=cache_key)
             if cached:
                 logger.info(f"Cache HIT for sequence {sequence_id}")
                 return cached
         
         # Simulate KV cache generation (expensive operation)
-        num_tokens = len(tokens)
-        time.sleep(self.generation_time * num_tokens)
-        
-        # Generate mock KV cache
-        hidden_size = 4096  # Example hidden size
-        num_heads = 32     # Example number of attention heads
-        head_dim = hidden_size // num_heads
-        
-        kv_cache = {
-            'k': np.random.randn(num_tokens, num_heads, head_dim).astype(np.float32),
-            'v': np.random.randn(num_tokens, num_heads, head_dim).astype(np.float32),
-            'sequence_id': sequence_id,
-            'tokens': tokens.copy()
-        }
+        self._simulate_generation(len(tokens))
+        kv_cache = self._build_kv(sequence_id, tokens)
         
         # Update cache
         if self.cache:
-            self.cache.update_cache(sequence_id, tokens, kv_cache)
+            self.cache.update_cache(sequence_id, tokens, kv_cache, precomputed_key=cache_key)
             
         return kv_cache
 
 def generate_sequence(length: int) -> List[int]:
     """Generate a random sequence of token IDs."""
-    return [random.randint(0, 50000) for _ in range(length)]
+    # Single vectorized draw; tolist() keeps the plugin-facing List[int] contract
+    return _RNG.integers(0, 50001, size=length, dtype=np.int32).tolist()
+
+def generate_reuse_workload(num_sequences: int, seq_length: int, reuse_rate: float,
+                            rng: Optional[np.random.Generator] = None) -> List[Dict[str, Any]]:
+    """Build a workload where about ``reuse_rate`` of the sequences repeat earlier ones.
+    
+    A pool of distinct sequences is drawn in one vectorized call. Each pool entry
+    appears at least once and the remaining slots sample the pool with repetition,
+    so repeats share the same token list object and cache key.
+    """
+    rng = rng or _RNG
+    pool_size = max(1, min(num_sequences, round(num_sequences * (1 - reuse_rate))))
+    pool = rng.integers(0, 50001, size=(pool_size, seq_length), dtype=np.int32).tolist()
+    keys = [LMCachePlugin.cache_key_for(tokens) for tokens in pool]
+    picks = np.concatenate([np.arange(pool_size), rng.integers(0, pool_size, num_sequences - pool_size)])
+    rng.shuffle(picks)
+    return [
+        {'id': f"seq_{i:03d}", 'tokens': pool[p], 'key': keys[p]}
+        for i, p in enumerate(picks.tolist())
+    ]
 
-def measure_ttf(llm: MockLLM, sequences: List[Dict]) -> float:
-    """Measure Time To First Token (TTFT) for a list of sequences."""
-    start_time = time.time()
+def _distinct_key_batches(sequences: List[Dict]) -> List[List[Dict]]:
+    """Split sequences into consecutive runs with no repeated cache key.
     
+    A repeat inside one batch would miss the lookup that sequential processing
+    turns into a hit, so a new batch starts whenever a key recurs.
+    """
+    batches: List[List[Dict]] = []
+    current: List[Dict] = []
+    seen = set()
     for seq in sequences:
-        llm.generate(seq['id'], seq['tokens'])
-        
-    total_time = time.time() - start_time
-    avg_ttf = total_time / len(sequences)
-    return avg_ttf
+        key = seq.get('key') or LMCachePlugin.cache_key_for(seq['tokens'])
+        if key in seen:
+            batches.append(current)
+            current, seen = [], set()
+        current.append(seq)
+        seen.add(key)
+    if current:
+        batches.append(current)
+    return batches
+
+def measure_ttf(llm: MockLLM, sequences: List[Dict]) -> Tuple[float, float]:
+    """Measure Time To First Token (TTFT) for a list of sequences.
+    
+    Returns the average wall-clock and average simulated (fast mode) time per sequence.
+    """
+    start_time = time.perf_counter()
+    start_sim = llm.simulated_seconds
+    
+    for batch in _distinct_key_batches(sequences):
+        # Results are discarded, so arena views never outlive the next batch
+        llm.generate_batch(
+            [seq['id'] for seq in batch],
+            [seq['tokens'] for seq in batch],
+            [seq.get('key') for seq in batch],
+        )
+
+    total_time = time.perf_counter() - start_time
+    total_sim = llm.simulated_seconds - start_sim
+    return total_time / len(sequences), total_sim / len(sequences)
+
+class _CSVSink:
+    """Append-only CSV writer that keeps its file open and writes rows in batches."""
+    
+    def __init__(self, path: Path, flush_every: int = 64):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, 'a', newline='', buffering=1 << 16)
+        self._writer = csv.writer(self._file)
+        self._fieldnames: Optional[List[str]] = None
+        # Append mode starts at EOF, so position 0 means the header is still missing
+        self._needs_header = self._file.tell() == 0
+        self._buffer: List[List[Any]] = []
+        self._flush_every = flush_every
+        atexit.register(self.close)
+    
+    def writerow(self, row: Dict[str, Any]) -> None:
+        if self._fieldnames is None:
+            self._fieldnames = list(row.keys())
+        self._buffer.append([row.get(k) for k in self._fieldnames])
+        if len(self._buffer) >= self._flush_every:
+            self.flush()
+    
+    def flush(self) -> None:
+        if self._file.closed:
+            return
+        if self._needs_header and self._fieldnames is not None:
+            self._writer.writerow(self._fieldnames)
+            self._needs_header = False
+        if self._buffer:
+            self._writer.writerows(self._buffer)
+            self._buffer.clear()
+        self._file.flush()
+    
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+_CSV_SINKS: Dict[str, _CSVSink] = {}
 
 def save_metrics_to_csv(metrics: Dict[str, Any], filename: str = "kv_reuse.csv"):
-    """Save metrics to a CSV file."""
-    # Create outputs directory if it doesn't exist
-    output_dir = Path("outputs")
-    output_dir.mkdir(exist_ok=True)
-    
-    # Prepare CSV data
-    csv_path = output_dir / filename
-    file_exists = csv_path.exists()
-    
-    with open(csv_path, 'a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=metrics.keys())
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(metrics)
-
-def run_demo(num_sequences: int = 10, seq_length: int = 100, use_cache: bool = True, backend: str = "fakeredis://"):
-    """Run the LMCache demo."""
+    """Queue a metrics row for outputs/<filename>; rows are flushed in batches and at exit."""
+    # Keyed by filename so repeat calls skip path construction entirely
+    sink = _CSV_SINKS.get(filename)
+    if sink is None:
+        sink = _CSV_SINKS[filename] = _CSVSink(_OUTPUT_DIR / filename)
+    sink.writerow(metrics)
+
+def run_demo(num_sequences: int = 10, seq_length: int = 100, use_cache: bool = True, backend: str = "fakeredis://",
+             fast: bool = False, kv_dtype: str = "fp16", timestamp: Optional[str] = None,
+             measure_baseline: bool = False, reuse_rate: Optional[float] = None):
+    """Run the LMCache demo.
+
+    Sweeps can pass a shared ``timestamp`` so every row of a batch carries the same run time.
+    The no-cache time is derived from the mock cost model unless ``measure_baseline`` is set.
+    With ``reuse_rate`` the workload is sampled from a shared pool instead of repeating
+    every third sequence.
+    """
     logger.info(f"Starting LMCache demo with {num_sequences} sequences (backend={backend}, cache={'on' if use_cache else 'off'})")
     
     # Initialize metrics dictionary
     metrics = {
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': timestamp or datetime.now().isoformat(),
         'num_sequences': num_sequences,
         'seq_length': seq_length,
         'use_cache': use_cache,
@@ -116,46 +307,51 @@ def run_demo(num_sequences: int = 10, seq_length: int = 100, use_cache: bool = T
         'enabled': use_cache,
         'backend': backend,
         'ttl': 3600,
-        'min_sequence_length': 10
+        'min_sequence_length': 10,
+        'dtype': kv_dtype
     }) if use_cache else None
     
     if cache_plugin:
         cache_plugin.on_startup()
     
     # Initialize mock LLM
-    llm = MockLLM(cache_plugin)
-    
-    # Generate test sequences (some will be repeated)
-    sequences = []
-    for i in range(num_sequences):
-        # Repeat some sequences to demonstrate cache hits
-        if i > 0 and i % 3 == 0:
-            # Reuse a previous sequence
-            seq_id = f"repeated_{i//3}"
-            tokens = sequences[i-3]['tokens']
-        else:
-            seq_id = f"seq_{i:03d}"
-            tokens = generate_sequence(seq_length)
-            
-        sequences.append({'id': seq_id, 'tokens': tokens})
+    llm = MockLLM(cache_plugin, fast_mode=fast, kv_dtype=kv_dtype)
+    
+    if reuse_rate is not None:
+        sequences = generate_reuse_workload(num_sequences, seq_length, reuse_rate)
+    else:
+        # Generate test sequences (some will be repeated). Every third sequence repeats the
+        # one three back, which chains to seq_000, so only the other indices need fresh tokens.
+        base = {i: generate_sequence(seq_length) for i in range(num_sequences) if i == 0 or i % 3}
+        # Hash each distinct sequence once up front instead of on every cache lookup
+        keys = {i: LMCachePlugin.cache_key_for(tokens) for i, tokens in base.items()}
+        sequences = [
+            {'id': f"repeated_{i//3}", 'tokens': base[0], 'key': keys[0]} if i and i % 3 == 0
+            else {'id': f"seq_{i:03d}", 'tokens': base[i], 'key': keys[i]}
+            for i in range(num_sequences)
+        ]
     
     # Warm-up run (not measured)
     _ = measure_ttf(llm, sequences[:2])
     
     # Benchmark without cache
-    if use_cache:
-        cache_plugin.config.enabled = False
-    
-    start_time = time.time()
-    avg_ttf_no_cache = measure_ttf(llm, sequences)
-    time_no_cache = time.time() - start_time
+    if measure_baseline or not use_cache:
+        if use_cache:
+            cache_plugin.config.enabled = False
+        
+        # Total time = wall clock + generation cost simulated in fast mode
+        avg_wall, avg_sim = measure_ttf(llm, sequences)
+        time_no_cache = (avg_wall + avg_sim) * len(sequences)
+    else:
+        # MockLLM's cost is deterministic (generation_time per token), so without a
+        # cache every sequence pays exactly that; skip the empirical pass
+        time_no_cache = sum(llm.generation_time * len(s['tokens']) for s in sequences)
     
     # Benchmark with cache
     if use_cache:
         cache_plugin.config.enabled = True
-        start_time = time.time()
-        avg_ttf_with_cache = measure_ttf(llm, sequences)
-        time_with_cache = time.time() - start_time
+        avg_wall, avg_sim = measure_ttf(llm, sequences)
+        time_with_cache = (avg_wall + avg_sim) * len(sequences)
         
         # Get cache metrics and merge without overwriting the base metrics dict
         plugin_metrics = cache_plugin.get_metrics()
@@ -187,7 +383,7 @@ def run_demo(num_sequences: int = 10, seq_length: int = 100, use_cache: bool = T
         print(f"Time without cache: {time_no_cache:.2f}s")
         print(f"Time with cache:    {time_with_cache:.2f}s")
         print(f"Speedup: {time_no_cache/time_with_cache:.2f}x")
-        print(f"Results saved to: outputs/kv_reuse.csv")
+        print(f"Results saved to: {_OUTPUT_DIR / 'kv_reuse.csv'}")
         print("="*50 + "\n")
     
     # Clean up
@@ -204,6 +400,15 @@ if __name__ == "__main__":
                        help='Disable caching for baseline measurement')
     parser.add_argument('--backend', type=str, default='fakeredis://',
                        help='Cache backend URL (e.g., fakeredis:// or redis://localhost:6379)')
+    parser.add_argument('--kv_dtype', type=str, default='fp16', choices=['fp32', 'fp16', 'bf16', 'int8'],
+                       help='Storage precision of mock KV tensors')
+    parser.add_argument('--fast', action='store_true',
+                       help='Account for generation cost without sleeping')
+    parser.add_argument('--measure-baseline', action='store_true',
+                       help='Time the no-cache pass instead of deriving it from the cost model')
+    parser.add_argument('--reuse-rate', type=float, default=None,
+                       help='Fraction of sequences that repeat a pooled one (e.g. 0.6); '
+                            'default repeats every third sequence')
     
     args = parser.parse_args()
     
@@ -211,5 +416,9 @@ if __name__ == "__main__":
         num_sequences=args.num_sequences,
         seq_length=args.seq_length,
         use_cache=not args.no_cache,
-        backend=args.backend
+        backend=args.backend,
+        fast=args.fast,
+        kv_dtype=args.kv_dtype,
+        measure_baseline=args.measure_baseline,
+        reuse_rate=args.reuse_rate
     )
@@ -4,13 +4,21 @@ Demo script for KV-OptKit that shows how to interact with the API.
 This script demonstrates submitting sequences, checking the advisor report,
 and simulating a simple workload.
 """
-import time
+import asyncio
 import random
-import requests
+import httpx
 from typing import List, Dict, Any, Optional
+try:
+    from orjson import loads as _loads  # optional, faster JSON parsing
+except ImportError:  # pragma: no cover
+    from json import loads as _loads
 
 # Configuration
 BASE_URL = "http://localhost:9000"
+# Sized for the concurrent submit/finish bursts below
+HTTP_LIMITS = httpx.Limits(max_connections=16, max_keepalive_connections=8)
+
+
 
 
 def print_report(report: Optional[Dict[str, Any]]) -> None:
@@ -53,80 +61,84 @@ def print_report(report: Optional[Dict[str, Any]]) -> None:
     print("="*80 + "\n")
 
 
-def get_advisor_report() -> Optional[Dict[str, Any]]:
+async def get_advisor_report(client: httpx.AsyncClient) -> Optional[Dict[str, Any]]:
     """Get the current advisor report."""
     try:
-        response = requests.get(f"{BASE_URL}/advisor/report", timeout=5)
+        response = await client.get(f"{BASE_URL}/advisor/report", timeout=5)
         response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
+        return _loads(response.content)
+    except (httpx.HTTPError, ValueError) as e:
         print(f"Error getting advisor report: {e}")
         return None
 
 
-def submit_sequence(seq_id: str, tokens: int) -> bool:
+async def submit_sequence(client: httpx.AsyncClient, seq_id: str, tokens: int) -> bool:
     """Submit a sequence to the simulator."""
     try:
-        response = requests.post(
+        response = await client.post(
             f"{BASE_URL}/sim/submit",
             json={"seq_id": seq_id, "tokens": tokens},
             timeout=5
         )
         response.raise_for_status()
         return True
-    except requests.RequestException as e:
+    except (httpx.HTTPError, ValueError) as e:
         print(f"Error submitting sequence {seq_id}: {e}")
         return False
 
 
-def finish_sequence(seq_id: str) -> bool:
+async def finish_sequence(client: httpx.AsyncClient, seq_id: str) -> bool:
     """Mark a sequence as finished."""
     try:
-        response = requests.delete(
+        response = await client.delete(
             f"{BASE_URL}/sim/finish/{seq_id}",
             timeout=5
         )
         return response.status_code == 200
-    except requests.RequestException:
+    except (httpx.HTTPError, ValueError):
         return False
 
 
-def reset_simulator() -> None:
+async def reset_simulator(client: httpx.AsyncClient) -> None:
     """Reset the simulator state."""
     try:
-        response = requests.post(
+        response = await client.post(
             f"{BASE_URL}/sim/reset",
             timeout=5
         )
         response.raise_for_status()
-    except requests.RequestException as e:
+    except (httpx.HTTPError, ValueError) as e:
         print(f"Error resetting simulator: {e}")
 
 
-def generate_workload(num_sequences: int = 10) -> List[Dict[str, Any]]:
-    """Generate a simple workload of sequences."""
+def generate_workload(num_sequences: int = 10, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Generate a simple workload of sequences.
+    
+    Pass ``seed`` to get a reproducible workload.
+    """
+    rng = random.Random(seed)
     sequences = []
     for i in range(num_sequences):
         seq_id = f"seq_{i+1}"
-        tokens = random.randint(100, 5000)  # Random sequence length
+        tokens = rng.randint(100, 5000)  # Random sequence length
         sequences.append({"id": seq_id, "tokens": tokens})
     return sequences
 
 
-def run_demo():
-    """Run the demo workflow."""
+async def run_demo_async(client: httpx.AsyncClient):
+    """Run the demo workflow against the given HTTP client."""
     print("KV-OptKit Demo")
     print("==============\n")
     
     # First check if server is running
     try:
-        response = requests.get(f"{BASE_URL}/healthz", timeout=2)
+        response = await client.get(f"{BASE_URL}/healthz", timeout=2)
         if response.status_code != 200:
             print("Error: Server is not responding. Please start the server first.")
             print("Run this command in a separate terminal:")
             print("python -m kvopt.server.main --engine sim --config config/sample_config.yaml")
             return
-    except requests.RequestException:
+    except (httpx.HTTPError, ValueError):
         print("Error: Could not connect to the server. Please make sure it's running.")
         print("Run this command in a separate terminal:")
         print("python -m kvopt.server.main --engine sim --config config/sample_config.yaml")
@@ -134,45 +146,55 @@ def run_demo():
     
     # Reset simulator to start fresh
     print("Resetting simulator...")
-    reset_simulator()
+    await reset_simulator(client)
     
     # Initial report (should be empty)
     print("\nInitial state:")
-    report = get_advisor_report()
+    report = await get_advisor_report(client)
     print_report(report)
     
     # Generate and submit some sequences
     print("Submitting sequences...")
     sequences = generate_workload(15)
-    for seq in sequences:
-        submit_sequence(seq["id"], seq["tokens"])
+    # Submissions are independent, so issue them concurrently over the shared pool
+    await asyncio.gather(*(submit_sequence(client, seq["id"], seq["tokens"]) for seq in sequences))
     
     # Get report with sequences
     print("\nAfter submitting sequences:")
-    report = get_advisor_report()
+    report = await get_advisor_report(client)
     print_report(report)
     
     # Simulate some time passing
     print("Simulating time passing (5s)...")
-    time.sleep(5)
+    await asyncio.sleep(5)
     
     # Get updated report
     print("\nAfter some time:")
-    report = get_advisor_report()
+    report = await get_advisor_report(client)
     print_report(report)
     
     # Finish some sequences
     print("Finishing some sequences...")
-    for seq in sequences[:5]:  # Finish first 5 sequences
-        finish_sequence(seq["id"])
+    # Finish first 5 sequences
+    await asyncio.gather(*(finish_sequence(client, seq["id"]) for seq in sequences[:5]))
     
     # Get final report
     print("\nFinal state:")
-    report = get_advisor_report()
+    report = await get_advisor_report(client)
     print_report(report)
     
     print("Demo complete!")
 
 
+async def _main():
+    async with httpx.AsyncClient(limits=HTTP_LIMITS) as client:
+        await run_demo_async(client)
+
+
+def run_demo():
+    """Run the demo workflow."""
+    asyncio.run(_main())
+
+
 if __name__ == "__main__":
     run_demo()
@@ -10,6 +10,7 @@ from typing import Dict, List, Optional, Any, Tuple
 import time
 import random
 import logging
+import threading
 
 from .actions import Action, Plan
 from .actions import ActionType  # enum for action types used in tests
@@ -51,7 +52,6 @@ class Guard:
         self.metrics: Dict[str, GuardMetrics] = {}
         # simple in-flight lock to serialize plan execution
         try:
-            import threading
             self._lock = threading.Lock()
         except Exception:  # pragma: no cover - defensive
             self._lock = None
@@ -2,28 +2,39 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Literal, Optional, Union, Type, Any
 import yaml
-from pydantic import BaseModel, Field, validator, root_validator
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
 import importlib
 
+# libyaml-backed loader when PyYAML was built with it; pure-Python otherwise
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 class SLOSettings(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     latency_p95_ms: float = 2000.0
     max_accuracy_delta_pct: float = 0.5
 
 
 class BudgetSettings(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     hbm_util_target: float = 0.85
     offload_bw_gbps: float = 120.0
 
 
 class PolicySettings(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     keep_recent_tokens: int = 4096
     eviction: List[str] = Field(default_factory=lambda: ["age_decay"])
     tiers: List[str] = Field(default_factory=lambda: ["HBM", "DDR", "CXL", "NVMe"])
 
 
 class GuardrailSettings(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     ab_shadow_fraction: float = 0.05
     rollback_on_acc_delta: bool = True
 
@@ -53,8 +64,7 @@ class PluginConfig(BaseModel):
     priority: int = 0
     plugin_type: PluginType
     
-    class Config:
-        extra = "forbid"  # Don't allow extra fields
+    model_config = ConfigDict(extra="forbid")  # Don't allow extra fields
 
 
 class LMCacheConfig(PluginConfig):
@@ -64,6 +74,7 @@ class LMCacheConfig(PluginConfig):
     ttl: int = 3600
     min_sequence_length: int = 1
     max_memory_mb: int = 1024
+    dtype: Literal["fp32", "fp16", "bf16", "int8"] = "fp16"
 
 
 class KIVIConfig(PluginConfig):
@@ -75,7 +86,18 @@ class KIVIConfig(PluginConfig):
     enabled: bool = True
 
 
-from .plugin_manager import PluginManager as PluginManagerImpl
+# Plugin config model per lower-cased plugin name; unknown names use PluginConfig
+_PLUGIN_CONFIG_REGISTRY: Dict[str, Type[PluginConfig]] = {
+    'lmcache': LMCacheConfig,
+    'kivi': KIVIConfig,
+}
+
+
+def register_plugin_config(name: str, config_cls: Type[PluginConfig]) -> None:
+    """Register the config model that Config.from_yaml uses for plugin ``name``."""
+    _PLUGIN_CONFIG_REGISTRY[name.lower()] = config_cls
+
+
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -99,17 +121,19 @@ class Config(BaseModel):
     _plugin_manager: Optional['PluginManager'] = None
     
     @property
-    def plugin_manager(self) -> PluginManagerImpl:
+    def plugin_manager(self) -> 'PluginManager':
         """Get or create the plugin manager."""
         if self._plugin_manager is None:
-            self._plugin_manager = PluginManagerImpl(self)
+            # Imported on first use so parsing a Config doesn't pull in every plugin
+            from .plugin_manager import PluginManager
+            self._plugin_manager = PluginManager(self)
             self._plugin_manager.load_plugins()
         return self._plugin_manager
     
     @classmethod
     def from_yaml(cls, path: Union[str, Path]) -> 'Config':
         with open(path, 'r') as f:
-            data = yaml.safe_load(f) or {}
+            data = yaml.load(f, Loader=_YAML_LOADER) or {}
             
         # Adapter section
         if 'adapter' in data and isinstance(data['adapter'], dict):
@@ -121,13 +145,8 @@ class Config(BaseModel):
         if 'plugins' in data:
             plugin_configs = {}
             for name, config in data['plugins'].items():
-                if name.lower() == 'lmcache':
-                    plugin_configs[name] = LMCacheConfig(**config)
-                elif name.lower() == 'kivi':
-                    plugin_configs[name] = KIVIConfig(**config)
-                else:
-                    # Default to base plugin config for unknown plugins
-                    plugin_configs[name] = PluginConfig(plugin_type=config.get('plugin_type'), **config)
+                config_cls = _PLUGIN_CONFIG_REGISTRY.get(name.lower(), PluginConfig)
+                plugin_configs[name] = config_cls(**config)
             data['plugins'] = plugin_configs
             
         return cls(**data)
@@ -185,3 +204,4 @@ class SequenceInfo(BaseModel):
     @property
     def age_seconds(self) -> float:
         return self.last_accessed - self.created_at
+
@@ -73,14 +73,15 @@ class PluginManager:
             
             # Create plugin instance
             logger.debug(f"Creating instance with config: {config}")
-            plugin = plugin_class(config.dict())
+            config_data = config.model_dump()
+            plugin = plugin_class(config_data)
             
             # Store plugin info
             self.plugins[name] = PluginInfo(
                 name=name,
                 instance=plugin,
                 module=module,
-                config=config.dict(),
+                config=config_data,
                 dependencies=getattr(config, 'dependencies', [])
             )
             logger.info(f"✅ Successfully loaded plugin: {name}")
@@ -138,7 +139,8 @@ class PluginManager:
     
     def get_plugin(self, name: str) -> Optional[BasePlugin]:
         """Get a plugin instance by name."""
-        return self.plugins[name].instance if name in self.plugins else None
+        info = self.plugins.get(name)
+        return info.instance if info is not None else None
         
     def get_plugins_by_type(self, plugin_type: Type[T]) -> List[T]:
         """Get all plugins of a specific type."""
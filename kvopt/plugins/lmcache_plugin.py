@@ -3,6 +3,7 @@ import hashlib
 import json
 import logging
 from typing import Dict, Any, Optional, List
+import numpy as np
 import redis
 try:
     import fakeredis  # optional, for in-memory backend
@@ -20,6 +21,7 @@ class LMCacheConfig(PluginConfig):
     ttl: int = 3600
     min_sequence_length: int = 16
     max_cache_size: int = 10_000
+    dtype: str = "fp16"  # precision of cached KV tensors: fp32, fp16, bf16 or int8
     
     def dict(self) -> Dict[str, Any]:
         """Serialize to dictionary."""
@@ -30,7 +32,8 @@ class LMCacheConfig(PluginConfig):
             "backend": self.backend,
             "ttl": self.ttl,
             "min_sequence_length": self.min_sequence_length,
-            "max_cache_size": self.max_cache_size
+            "max_cache_size": self.max_cache_size,
+            "dtype": self.dtype
         }
     
     def model_dump(self) -> Dict[str, Any]:
@@ -53,7 +56,8 @@ class LMCachePlugin(ReusePlugin):
             backend=config.get("backend", "redis://localhost:6379"),
             ttl=int(config.get("ttl", 3600)),
             min_sequence_length=int(config.get("min_sequence_length", 16)),
-            max_cache_size=int(config.get("max_cache_size", 10_000))
+            max_cache_size=int(config.get("max_cache_size", 10_000)),
+            dtype=str(config.get("dtype", "fp16"))
         )
     
     def on_startup(self):
@@ -78,8 +82,20 @@ class LMCachePlugin(ReusePlugin):
             self.redis.close()
             self.redis = None
     
-    def _get_cache_key(self, tokens: List[int]) -> str:
-        return f"lmcache:{hashlib.sha256(','.join(map(str, tokens)).encode()).hexdigest()}"
+    @staticmethod
+    def cache_key_for(tokens: List[int]) -> str:
+        """Build the cache key for a token sequence.
+        
+        Tokens are packed into a contiguous int64 buffer and hashed with sha256 in
+        one call. The algorithm is fixed so every worker sharing a backend derives
+        the same key. Callers that reuse a sequence can compute this once and pass
+        it as ``precomputed_key``.
+        """
+        buf = np.asarray(tokens, dtype=np.int64).tobytes()
+        return f"lmcache:{hashlib.sha256(buf).hexdigest()}"
+    
+    def _get_cache_key(self, tokens: List[int], precomputed_key: Optional[str] = None) -> str:
+        return precomputed_key if precomputed_key is not None else self.cache_key_for(tokens)
     
     def store_cache(self, sequence_id: str, tokens: List[int], data: Dict[str, Any]) -> bool:
         """Store data in cache."""
@@ -95,7 +111,8 @@ class LMCachePlugin(ReusePlugin):
             logger.warning(f"Failed to store cache: {e}")
             return False
     
-    def check_cache(self, sequence_id: str, tokens: List[int]) -> Optional[Dict[str, Any]]:
+    def check_cache(self, sequence_id: str, tokens: List[int],
+                    precomputed_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
         # Reads behavior:
         # - fakeredis backend: enforce min_sequence_length gating (no access/metrics when below threshold)
         # - real Redis backend: allow reads regardless of min_sequence_length
@@ -105,7 +122,7 @@ class LMCachePlugin(ReusePlugin):
         if is_fakeredis_backend and len(tokens) < self.config.min_sequence_length:
             return None
         try:
-            cache_key = self._get_cache_key(tokens)
+            cache_key = self._get_cache_key(tokens, precomputed_key)
             if cached := self.redis.get(cache_key):
                 self.hits += 1
                 # Redis may return bytes; decode to str for json
@@ -117,21 +134,82 @@ class LMCachePlugin(ReusePlugin):
             logger.error(f"Cache check failed: {e}")
         return None
     
-    def update_cache(self, sequence_id: str, tokens: List[int], kv_data: Dict):
+    def check_cache_batch(self, sequence_ids: List[str], tokens_list: List[List[int]],
+                          precomputed_keys: Optional[List[Optional[str]]] = None) -> List[Optional[Dict[str, Any]]]:
+        """Look up many sequences with a single pipelined round-trip.
+        
+        Returns one entry per sequence (None on miss or when skipped); gating and
+        hit/miss accounting match check_cache.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(tokens_list)
+        if not self.config.enabled or not self.redis:
+            return results
+        is_fakeredis_backend = str(getattr(self.config, 'backend', '')).startswith("fakeredis://")
+        keys = precomputed_keys or [None] * len(tokens_list)
+        eligible = [
+            i for i, tokens in enumerate(tokens_list)
+            if not (is_fakeredis_backend and len(tokens) < self.config.min_sequence_length)
+        ]
+        if not eligible:
+            return results
+        try:
+            pipe = self.redis.pipeline()
+            for i in eligible:
+                pipe.get(self._get_cache_key(tokens_list[i], keys[i]))
+            values = pipe.execute()
+        except Exception as e:
+            logger.error(f"Batch cache check failed: {e}")
+            return results
+        for i, cached in zip(eligible, values):
+            if cached:
+                self.hits += 1
+                if isinstance(cached, (bytes, bytearray)):
+                    cached = cached.decode("utf-8")
+                results[i] = json.loads(cached)
+            else:
+                self.misses += 1
+        return results
+    
+    def update_cache(self, sequence_id: str, tokens: List[int], kv_data: Dict,
+                     precomputed_key: Optional[str] = None):
         if not self.config.enabled or len(tokens) < self.config.min_sequence_length:
             return
         try:
-            cache_key = self._get_cache_key(tokens)
+            cache_key = self._get_cache_key(tokens, precomputed_key)
             # Store only lightweight, JSON-serializable metadata to avoid numpy serialization
             # and to keep the demo focused on reuse behavior rather than payload transport.
             payload = {
                 "sequence_id": sequence_id,
                 "token_count": len(tokens)
             }
+            if "dtype" in kv_data:
+                payload["dtype"] = kv_data["dtype"]
             self.redis.setex(cache_key, self.config.ttl, json.dumps(payload))
         except Exception as e:
             logger.error(f"Cache update failed: {e}")
     
+    def update_cache_batch(self, sequence_ids: List[str], tokens_list: List[List[int]], kv_data_list: List[Dict],
+                           precomputed_keys: Optional[List[Optional[str]]] = None):
+        """Write many cache entries with a single pipelined round-trip."""
+        if not self.config.enabled:
+            return
+        keys = precomputed_keys or [None] * len(tokens_list)
+        try:
+            pipe = self.redis.pipeline()
+            for seq_id, tokens, kv_data, key in zip(sequence_ids, tokens_list, kv_data_list, keys):
+                if len(tokens) < self.config.min_sequence_length:
+                    continue
+                payload = {
+                    "sequence_id": seq_id,
+                    "token_count": len(tokens)
+                }
+                if "dtype" in kv_data:
+                    payload["dtype"] = kv_data["dtype"]
+                pipe.setex(self._get_cache_key(tokens, key), self.config.ttl, json.dumps(payload))
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Batch cache update failed: {e}")
+    
     def get_metrics(self) -> Dict[str, Any]:
         return {
             "hits": self.hits,
@@ -4,6 +4,7 @@ MiniKV Plugin
 A simplified version of the KIVI quantization plugin for KV cache compression.
 This plugin provides basic quantization with minimal configuration options.
 """
+import time
 import numpy as np
 from typing import Dict, Any, Optional, Tuple, List
 import logging
@@ -74,7 +75,6 @@ class MiniKVPlugin(QuantizationPlugin):
         Returns:
             Dictionary with quantized 'k' and 'v' arrays
         """
-        import time
         start_time = time.time()
         
         quantized = {}
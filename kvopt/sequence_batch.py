@@ -0,0 +1,29 @@
+from typing import List
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+
+from .config import SequenceInfo
+
+
+class SequenceBatch(BaseModel):
+    """Column-wise view of many sequences for bulk age/length computations."""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    ids: List[str]
+    lengths: np.ndarray
+    created_at: np.ndarray
+    last_accessed: np.ndarray
+
+    @classmethod
+    def from_sequences(cls, sequences: List[SequenceInfo]) -> 'SequenceBatch':
+        return cls(
+            ids=[s.seq_id for s in sequences],
+            lengths=np.fromiter((s.length_tokens for s in sequences), dtype=np.int64, count=len(sequences)),
+            created_at=np.fromiter((s.created_at for s in sequences), dtype=np.float64, count=len(sequences)),
+            last_accessed=np.fromiter((s.last_accessed for s in sequences), dtype=np.float64, count=len(sequences)),
+        )
+
+    @property
+    def age_seconds(self) -> np.ndarray:
+        return self.last_accessed - self.created_at
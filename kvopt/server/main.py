@@ -8,7 +8,7 @@ import logging
 from fastapi import FastAPI, Depends, HTTPException, status, Response
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Dict, Any, Optional, List
 
 from kvopt.config import Config
@@ -72,6 +72,17 @@ class HealthResponse(BaseModel):
     adapter: str
 
 
+class SequenceSubmission(BaseModel):
+    """A single sequence to register with the adapter."""
+    sequence_id: str
+    length_tokens: int = Field(..., gt=0)
+
+
+class SequenceBatchRequest(BaseModel):
+    """Request model for submitting many sequences in one call."""
+    sequences: List[SequenceSubmission]
+
+
 def get_config() -> Config:
     """Get the current configuration."""
     if _config is None:
@@ -161,7 +172,7 @@ async def startup_event():
         
         # Initialize adapter based on configuration
         if _config.adapter.type == "sim":
-            _adapter = SimAdapter(_config.adapter.model_dump())
+            _adapter = SimAdapter(_config.adapter.model_dump(exclude_none=True))
         elif _config.adapter.type == "vllm":
             _adapter = VLLMAdapter(_config.adapter.model_dump())
         else:
@@ -214,6 +225,27 @@ async def get_telemetry(adapter: Any = Depends(get_adapter)):
     return adapter.get_telemetry()
 
 
+@app.post("/sequences/batch")
+async def submit_sequences_batch(request: SequenceBatchRequest, adapter: Any = Depends(get_adapter)):
+    """Submit a batch of sequences in a single request.
+    Returns a per-item status so clients can report on each sequence.
+    """
+    if not hasattr(adapter, "submit_sequence"):
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"{adapter.__class__.__name__} does not support sequence submission"
+        )
+    results = [
+        {
+            "sequence_id": seq.sequence_id,
+            "length_tokens": seq.length_tokens,
+            "accepted": bool(adapter.submit_sequence(seq.sequence_id, seq.length_tokens)),
+        }
+        for seq in request.sequences
+    ]
+    return {"results": results}
+
+
 @app.get("/metrics")
 async def metrics():
     """Prometheus metrics endpoint.
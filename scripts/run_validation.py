@@ -6,10 +6,17 @@ This script runs all tests and verifies the demo functionality.
 import subprocess
 import sys
 import os
+import importlib.util
 import json
 import time
+import pytest
+import requests
 from typing import Dict, Any, Tuple, Optional
 from pathlib import Path
+try:
+    import orjson  # optional, faster JSON parsing
+except Exception:  # pragma: no cover
+    orjson = None
 
 # Add project root to Python path
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -29,6 +36,25 @@ SERVER_URL = "http://localhost:9000"
 SERVER_START_TIMEOUT = 10  # seconds
 
 
+def _server_command() -> list:
+    """uvicorn command line for the test server, on uvloop/httptools where available."""
+    cmd = ["uvicorn", "kvopt.server.main:app", "--host", "0.0.0.0", "--port", "9000", "--workers", "1"]
+    # uvloop has no Windows support; use uvicorn's default loop/parser there or when not installed
+    if sys.platform != "win32" and all(importlib.util.find_spec(m) for m in ("uvloop", "httptools")):
+        cmd += ["--loop", "uvloop", "--http", "httptools"]
+    return cmd
+
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _dumps_pretty(data: Any) -> str:
+    """Serialize data as indented JSON, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(data, indent=2)
+
+
 def run_command(cmd: str, cwd: Optional[str] = None) -> Tuple[bool, str]:
     """Run a shell command and return (success, output)."""
     try:
@@ -47,24 +73,41 @@ def run_command(cmd: str, cwd: Optional[str] = None) -> Tuple[bool, str]:
         return False, f"Error running '{cmd}': {str(e)}"
 
 
+class _FileOutcomeCollector:
+    """pytest plugin that records whether each test file passed."""
+    
+    def __init__(self):
+        self.failed: Dict[str, bool] = {}
+    
+    def _record(self, nodeid: str, failed: bool) -> None:
+        file_name = Path(nodeid.split("::", 1)[0]).name
+        self.failed[file_name] = self.failed.get(file_name, False) or failed
+    
+    def pytest_collectreport(self, report) -> None:
+        if report.failed:
+            self._record(report.nodeid, True)
+    
+    def pytest_runtest_logreport(self, report) -> None:
+        self._record(report.nodeid, report.failed)
+
+
 def run_tests() -> Tuple[bool, str]:
-    """Run all unit tests."""
+    """Run all unit tests in a single in-process pytest session."""
     print("\n=== Running Unit Tests ===")
-    all_passed = True
-    output = []
+    collector = _FileOutcomeCollector()
+    rc = pytest.main(["-v", *[str(TEST_DIR / f) for f in TEST_FILES]], plugins=[collector])
     
+    output = []
     for test_file in TEST_FILES:
-        test_path = TEST_DIR / test_file
-        print(f"\nRunning {test_file}...")
-        success, result = run_command(f"python -m pytest {test_path} -v")
-        output.append(f"=== {test_file} ===\n{result}")
-        if not success:
-            all_passed = False
+        # A file with no recorded reports was never collected
+        if collector.failed.get(test_file, True):
             print(f"❌ {test_file} failed")
+            output.append(f"{test_file}: failed")
         else:
             print(f"✅ {test_file} passed")
+            output.append(f"{test_file}: passed")
     
-    return all_passed, "\n".join(output)
+    return rc == pytest.ExitCode.OK, "\n".join(output)
 
 
 def start_test_server() -> Tuple[bool, Optional[subprocess.Popen], str]:
@@ -73,27 +116,32 @@ def start_test_server() -> Tuple[bool, Optional[subprocess.Popen], str]:
     try:
         # Start the server in a separate process
         server_process = subprocess.Popen(
-            ["uvicorn", "kvopt.server.main:app", "--host", "0.0.0.0", "--port", "9000"],
+            _server_command(),
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True
         )
         
-        # Wait for server to start
+        # Poll the health endpoint with exponential backoff until the server answers
         print("Waiting for server to start...")
-        time.sleep(2)  # Give server time to start
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        delay = 0.05
+        last_error = "no response"
+        while time.monotonic() < deadline:
+            try:
+                response = requests.get(f"{SERVER_URL}/healthz", timeout=0.5)
+                if response.ok:
+                    print("✅ Test server started successfully")
+                    return True, server_process, "Server started successfully"
+                last_error = f"Server returned status {response.status_code}"
+            except requests.RequestException as e:
+                last_error = f"Failed to connect to server: {str(e)}"
+            if server_process.poll() is not None:
+                return False, server_process, f"Server exited with code {server_process.returncode}"
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
         
-        # Verify server is running
-        try:
-            import requests
-            response = requests.get(f"{SERVER_URL}/health")
-            if response.status_code == 200:
-                print("✅ Test server started successfully")
-                return True, server_process, "Server started successfully"
-            else:
-                return False, server_process, f"Server returned status {response.status_code}"
-        except Exception as e:
-            return False, server_process, f"Failed to connect to server: {str(e)}"
+        return False, server_process, f"Server not ready after {SERVER_START_TIMEOUT}s: {last_error}"
             
     except Exception as e:
         return False, None, f"Failed to start server: {str(e)}"
@@ -134,8 +182,6 @@ def run_integration_tests() -> Tuple[bool, str]:
     print("\n=== Running Integration Tests ===")
     
     try:
-        import requests
-        
         # Test 1: Create a plan
         print("Testing plan creation...")
         response = requests.post(
@@ -146,7 +192,7 @@ def run_integration_tests() -> Tuple[bool, str]:
         if response.status_code != 200:
             return False, f"Failed to create plan: {response.text}"
             
-        plan_data = response.json()
+        plan_data = _loads(response.content)
         plan_id = plan_data.get("plan_id")
         
         if not plan_id:
@@ -161,7 +207,7 @@ def run_integration_tests() -> Tuple[bool, str]:
         if response.status_code != 200:
             return False, f"Failed to get plan status: {response.text}"
             
-        status_data = response.json()
+        status_data = _loads(response.content)
         print(f"✅ Plan status: {status_data.get('status')}")
         
         # Test 3: Get metrics
@@ -171,8 +217,8 @@ def run_integration_tests() -> Tuple[bool, str]:
         if response.status_code != 200:
             return False, f"Failed to get metrics: {response.text}"
             
-        metrics = response.json()
-        print(f"✅ Retrieved metrics: {json.dumps(metrics, indent=2)}")
+        metrics = _loads(response.content)
+        print(f"✅ Retrieved metrics: {_dumps_pretty(metrics)}")
         
         return True, "Integration tests completed successfully"
         
@@ -7,7 +7,7 @@ setup(
     install_requires=[
         "fastapi>=0.68.0",
         "uvicorn>=0.15.0",
-        "pydantic>=1.8.0",
+        "pydantic>=2.5.0",
         "pyyaml>=5.4.1",
         "requests>=2.26.0",
     ],
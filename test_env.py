@@ -18,8 +18,8 @@ def test_imports():
     
     # Print Python info
     logger.info(f"Python version: {sys.version}")
-    logger.info(f"Python path: {sys.path}")
-    logger.info(f"Current working directory: {os.getcwd()}")
+    logger.debug(f"Python path: {sys.path}")
+    logger.debug(f"Current working directory: {os.getcwd()}")
     
     # Try importing key modules
     try:
@@ -29,12 +29,16 @@ def test_imports():
         from kvopt.config import Config, PluginType
         logger.info("Successfully imported Config and PluginType")
         
-        from kvopt.plugins import ReusePlugin, QuantizationPlugin
-        logger.info("Successfully imported plugin base classes")
-        
-        from kvopt.plugins.lmcache_plugin import LMCacheConfig
-        from kvopt.plugins.kivi_plugin import KIVIConfig
-        logger.info("Successfully imported plugin configs")
+        # Plugin modules pull in optional heavy dependencies; only probe them on request
+        if os.environ.get("KVOPT_FULL_IMPORT_CHECK"):
+            from kvopt.plugins import ReusePlugin, QuantizationPlugin
+            logger.info("Successfully imported plugin base classes")
+            
+            from kvopt.plugins.lmcache_plugin import LMCacheConfig
+            from kvopt.plugins.kivi_plugin import KIVIConfig
+            logger.info("Successfully imported plugin configs")
+        else:
+            logger.debug("Skipping plugin imports (set KVOPT_FULL_IMPORT_CHECK=1 to include them)")
         
         return True
         
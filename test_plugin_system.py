@@ -3,13 +3,14 @@
 Test script for the enhanced plugin system.
 """
 import logging
+import os
 import sys
-import traceback
 from pathlib import Path
 
-# Configure logging with more detailed format
+# Configure logging with environment variable support (LOGLEVEL=DEBUG for detailed output)
+log_level = os.getenv('LOGLEVEL', 'INFO').upper()
 logging.basicConfig(
-    level=logging.DEBUG,  # Set to DEBUG for more detailed output
+    level=log_level,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(sys.stdout)
@@ -17,9 +18,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Enable debug logging for kvopt modules
+# Apply the same level to kvopt modules
 for module in ['kvopt', 'kvopt.plugins', 'kvopt.config']:
-    logging.getLogger(module).setLevel(logging.DEBUG)
+    logging.getLogger(module).setLevel(log_level)
 
 def test_plugin_loading():
     """Test loading and initializing plugins with detailed logging."""
@@ -56,23 +57,22 @@ def test_plugin_loading():
         )
         logger.debug("Test configuration created successfully")
     except Exception as e:
-        logger.error(f"Failed to create test config: {e}")
-        logger.debug(traceback.format_exc())
+        logger.exception("Failed to create test config: %s", e)
         raise
     
     # Test plugin manager
     try:
         logger.info("Accessing plugin manager...")
         pm = config.plugin_manager
-        logger.info(f"Plugin manager initialized. Loaded plugins: {list(pm.plugins.keys())}")
+        logger.info("Plugin manager initialized. Loaded plugins: %s", list(pm.plugins))
         
         # Test getting plugins
         logger.info("Testing plugin retrieval...")
         lmcache = pm.get_plugin("lmcache")
         kivi = pm.get_plugin("kivi")
         
-        logger.debug(f"LMCache plugin: {'Found' if lmcache else 'Not found'}")
-        logger.debug(f"KIVI plugin: {'Found' if kivi else 'Not found'}")
+        logger.debug("LMCache plugin: %s", 'Found' if lmcache else 'Not found')
+        logger.debug("KIVI plugin: %s", 'Found' if kivi else 'Not found')
         
         assert lmcache is not None, "LMCache plugin not loaded"
         assert kivi is not None, "KIVI plugin not loaded"
@@ -82,8 +82,8 @@ def test_plugin_loading():
         reuse_plugins = pm.get_plugins_by_type(ReusePlugin)
         quant_plugins = pm.get_plugins_by_type(QuantizationPlugin)
         
-        logger.debug(f"Found {len(reuse_plugins)} reuse plugins")
-        logger.debug(f"Found {len(quant_plugins)} quantization plugins")
+        logger.debug("Found %d reuse plugins", len(reuse_plugins))
+        logger.debug("Found %d quantization plugins", len(quant_plugins))
         
         assert len(reuse_plugins) > 0, "No reuse plugins found"
         assert len(quant_plugins) > 0, "No quantization plugins found"
@@ -91,8 +91,7 @@ def test_plugin_loading():
         logger.info("All plugin tests passed!")
         
     except Exception as e:
-        logger.error(f"Plugin test failed: {e}")
-        logger.debug(traceback.format_exc())
+        logger.exception("Plugin test failed: %s", e)
         raise
     finally:
         # Clean up
@@ -101,12 +100,10 @@ def test_plugin_loading():
             pm.shutdown()
             logger.info("Plugin shutdown complete")
         except Exception as e:
-            logger.error(f"Error during plugin shutdown: {e}")
-            logger.debug(traceback.format_exc())
+            logger.exception("Error during plugin shutdown: %s", e)
 
 def setup_environment():
     """Set up the Python environment for testing."""
-    import os
     import site
     
     # Add project root to Python path
@@ -114,13 +111,8 @@ def setup_environment():
     if project_root not in sys.path:
         sys.path.insert(0, project_root)
     
-    # Enable debug logging for all kvopt modules
-    for name in logging.root.manager.loggerDict:
-        if name.startswith('kvopt'):
-            logging.getLogger(name).setLevel(logging.DEBUG)
-    
     logger.info("Environment setup complete")
-    logger.debug(f"Python path: {sys.path}")
+    logger.debug("Python path: %s", sys.path)
 
 if __name__ == "__main__":
     try:
@@ -130,13 +122,13 @@ if __name__ == "__main__":
         logger.info("✅ Plugin system test completed successfully!")
     except ImportError as e:
         logger.error(f"❌ Import error: {e}")
-        logger.debug(f"Python path: {sys.path}")
-        logger.debug(f"Current working directory: {os.getcwd()}")
-        logger.debug(f"Files in current directory: {os.listdir('.')}")
-        if 'kvopt' in sys.modules:
-            logger.debug(f"kvopt module path: {sys.modules['kvopt'].__file__}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Python path: %s", sys.path)
+            logger.debug("Current working directory: %s", os.getcwd())
+            logger.debug("Files in current directory: %s", os.listdir('.'))
+            if 'kvopt' in sys.modules:
+                logger.debug("kvopt module path: %s", sys.modules['kvopt'].__file__)
         raise
     except Exception as e:
-        logger.error(f"❌ Test failed: {e}")
-        logger.debug(f"Error details: {traceback.format_exc()}")
+        logger.exception("❌ Test failed: %s", e)
         raise
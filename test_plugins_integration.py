@@ -11,31 +11,37 @@ from pathlib import Path
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-# Configure logging
+from kvopt.config import Config
+from kvopt.plugins.lmcache_plugin import LMCachePlugin, LMCacheConfig
+from kvopt.plugins.kivi_plugin import KIVIPlugin, KIVIConfig
+
+# Seeded generator for test tensors; draws float32 directly
+_rng = np.random.default_rng(0)
+
+# Configure logging with environment variable support (LOGLEVEL=DEBUG for detailed output)
+log_level = os.getenv('LOGLEVEL', 'INFO').upper()
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=log_level,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[logging.StreamHandler()]
 )
 logger = logging.getLogger(__name__)
 
+# kvopt loggers whose level follows LOGLEVEL; child modules inherit from these
+KVOPT_LOGGERS = ['kvopt', 'kvopt.plugins', 'kvopt.config']
+
 class TestPlugins(unittest.TestCase):
     """Test plugin loading and basic functionality."""
     
     @classmethod
     def setUpClass(cls):
         """Set up test environment."""
-        # Enable debug logging for all kvopt modules
-        for name in logging.root.manager.loggerDict:
-            if name.startswith('kvopt'):
-                logging.getLogger(name).setLevel(logging.DEBUG)
+        # Apply the configured level to the kvopt loggers
+        for name in KVOPT_LOGGERS:
+            logging.getLogger(name).setLevel(log_level)
     
     def test_plugin_loading(self):
         """Test that plugins can be loaded and initialized."""
-        from kvopt.config import Config
-        from kvopt.plugins.lmcache_plugin import LMCacheConfig
-        from kvopt.plugins.kivi_plugin import KIVIConfig
-        
         # Create a test config
         config = Config(
             plugins={
@@ -70,8 +76,6 @@ class TestPlugins(unittest.TestCase):
     @patch('redis.Redis')
     def test_lmcache_plugin(self, mock_redis):
         """Test LMCache plugin with mocked Redis."""
-        from kvopt.plugins.lmcache_plugin import LMCachePlugin, LMCacheConfig
-        
         # Setup mock Redis
         mock_redis.return_value.ping.return_value = True
         mock_redis.return_value.get.return_value = None
@@ -82,7 +86,8 @@ class TestPlugins(unittest.TestCase):
             backend="redis://localhost:6379",
             ttl=3600
         )
-        plugin = LMCachePlugin(config.model_dump())
+        cfg_dict = config.model_dump()
+        plugin = LMCachePlugin(cfg_dict)
         plugin.on_startup()
         
         # Test cache miss
@@ -100,8 +105,6 @@ class TestPlugins(unittest.TestCase):
     
     def test_kivi_plugin(self):
         """Test KIVI plugin functionality."""
-        from kvopt.plugins.kivi_plugin import KIVIPlugin, KIVIConfig
-        
         # Create and initialize plugin
         config = KIVIConfig(
             name="test_kivi",
@@ -109,14 +112,16 @@ class TestPlugins(unittest.TestCase):
             group_size=8,
             min_tokens=1  # Lower for testing
         )
-        plugin = KIVIPlugin(config.model_dump())
+        kcfg = config.model_dump()
+        plugin = KIVIPlugin(kcfg)
         plugin.on_startup()
         
         # Test quantization
+        shape = (1, 32, 16, 64)
         test_data = {
             "cache": {
-                "key": np.random.rand(1, 32, 16, 64).astype(np.float32),
-                "value": np.random.rand(1, 32, 16, 64).astype(np.float32)
+                "key": _rng.random(shape, dtype=np.float32),
+                "value": _rng.random(shape, dtype=np.float32)
             },
             "layer_idx": 0,
             "token_pos": 0
@@ -1,22 +1,14 @@
-import sys
-import os
-import asyncio
-from fastapi import FastAPI
 from fastapi.testclient import TestClient
-from kvopt.server.main import app, startup_event
+from kvopt.server.main import app
 
 def test_server_startup():
     """Test if the server can start up correctly."""
-    # Initialize the app
-    asyncio.run(startup_event())
-    
-    # Create a test client
-    client = TestClient(app)
-    
-    # Test health check endpoint
-    response = client.get("/health")
-    assert response.status_code == 200
-    assert response.json()["status"] == "ok"
+    # The context manager runs the app's lifespan startup and shutdown
+    with TestClient(app) as client:
+        # Test health check endpoint
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ok"
     
     print("✅ Server started successfully and health check passed")
 
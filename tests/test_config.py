@@ -0,0 +1,66 @@
+import yaml
+
+from kvopt.config import (
+    Config,
+    KIVIConfig,
+    LMCacheConfig,
+    PluginConfig,
+    PluginType,
+    SequenceInfo,
+    register_plugin_config,
+    _PLUGIN_CONFIG_REGISTRY,
+)
+from kvopt.sequence_batch import SequenceBatch
+
+
+class DummyEvictionConfig(PluginConfig):
+    plugin_type: PluginType = PluginType.EVICTION
+    window: int = 8
+
+
+def test_from_yaml_dispatches_plugin_configs(tmp_path, monkeypatch):
+    monkeypatch.setitem(_PLUGIN_CONFIG_REGISTRY, "dummy", DummyEvictionConfig)
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.safe_dump({
+        "plugins": {
+            "LMCache": {"backend": "fakeredis://"},
+            "kivi": {"bitwidth": 2},
+            "Dummy": {"window": 16},
+            "other": {"plugin_type": "monitoring"},
+        }
+    }))
+
+    plugins = Config.from_yaml(path).plugins
+
+    assert isinstance(plugins["LMCache"], LMCacheConfig)
+    assert isinstance(plugins["kivi"], KIVIConfig) and plugins["kivi"].bitwidth == 2
+    assert isinstance(plugins["Dummy"], DummyEvictionConfig) and plugins["Dummy"].window == 16
+    assert type(plugins["other"]) is PluginConfig
+    assert plugins["other"].plugin_type == PluginType.MONITORING
+
+
+def test_register_plugin_config_is_case_insensitive(monkeypatch):
+    monkeypatch.setattr("kvopt.config._PLUGIN_CONFIG_REGISTRY", dict(_PLUGIN_CONFIG_REGISTRY))
+    register_plugin_config("MyEviction", DummyEvictionConfig)
+
+    from kvopt import config
+    assert config._PLUGIN_CONFIG_REGISTRY["myeviction"] is DummyEvictionConfig
+
+
+def test_sequence_batch_matches_sequence_info():
+    sequences = [
+        SequenceInfo(seq_id="a", length_tokens=128, created_at=10.0, last_accessed=12.5),
+        SequenceInfo(seq_id="b", length_tokens=4096, created_at=3.0, last_accessed=30.0),
+    ]
+
+    batch = SequenceBatch.from_sequences(sequences)
+
+    assert batch.ids == ["a", "b"]
+    assert batch.lengths.tolist() == [128, 4096]
+    assert batch.age_seconds.tolist() == [s.age_seconds for s in sequences]
+
+
+def test_sequence_batch_from_empty_list():
+    batch = SequenceBatch.from_sequences([])
+
+    assert batch.ids == [] and batch.age_seconds.shape == (0,)
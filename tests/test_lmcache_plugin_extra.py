@@ -2,6 +2,9 @@
 Additional targeted tests for LMCachePlugin.
 Covers min_sequence_length gating and explicit hit/miss accounting using fakeredis.
 """
+import hashlib
+
+import numpy as np
 import pytest
 
 from kvopt.plugins.lmcache_plugin import LMCachePlugin
@@ -57,3 +60,58 @@ def test_cache_by_content_with_different_sequence_ids():
         assert cached.get('token_count') == len(tokens)
     finally:
         plugin.on_shutdown()
+
+
+def test_cache_key_format_is_stable():
+    # Workers sharing a backend must agree on keys regardless of installed extras
+    tokens = [1, 2, 3, 50000]
+    digest = hashlib.sha256(np.asarray(tokens, dtype=np.int64).tobytes()).hexdigest()
+    assert LMCachePlugin.cache_key_for(tokens) == f"lmcache:{digest}"
+
+
+def test_precomputed_key_matches_internal_key():
+    plugin = LMCachePlugin({
+        'backend': 'fakeredis://',
+        'min_sequence_length': 1,
+    })
+    plugin.on_startup()
+
+    try:
+        tokens = [4, 5, 6, 7]
+        key = LMCachePlugin.cache_key_for(tokens)
+        assert key == LMCachePlugin.cache_key_for(list(tokens))
+        assert key != LMCachePlugin.cache_key_for([4, 5, 6, 8])
+
+        # Writing with a precomputed key is visible to lookups that hash internally
+        plugin.update_cache('seq-A', tokens, {'mock': True}, precomputed_key=key)
+        assert plugin.check_cache('seq-B', tokens) is not None
+        assert plugin.check_cache('seq-C', tokens, precomputed_key=key) is not None
+    finally:
+        plugin.on_shutdown()
+
+
+def test_batch_check_and_update_match_single_item_semantics():
+    plugin = LMCachePlugin({
+        'backend': 'fakeredis://',
+        'min_sequence_length': 3,
+    })
+    plugin.on_startup()
+
+    try:
+        ids = ['a', 'b', 'short']
+        tokens_list = [[1, 2, 3], [4, 5, 6], [7]]
+
+        # All misses; the short sequence is gated and not counted
+        assert plugin.check_cache_batch(ids, tokens_list) == [None, None, None]
+        assert plugin.get_metrics()['misses'] == 2
+
+        plugin.update_cache_batch(ids, tokens_list, [{}, {}, {}])
+        results = plugin.check_cache_batch(ids, tokens_list)
+        assert [r is not None for r in results] == [True, True, False]
+        assert results[1]['token_count'] == 3
+        assert plugin.get_metrics()['hits'] == 2
+
+        # Batch writes are visible to single-item lookups
+        assert plugin.check_cache('other', [4, 5, 6]) is not None
+    finally:
+        plugin.on_shutdown()
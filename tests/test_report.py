@@ -1,4 +1,5 @@
 import pandas as pd
+import pytest
 from pathlib import Path
 from tools.make_report import generate_report
 
@@ -37,3 +38,79 @@ def test_report_from_csv(tmp_path: Path):
     # Summary contains DDR and Action Counters
     assert "DDR before" in text
     assert "Action Counters" in text
+
+
+def test_parse_prometheus_text_skips_comments_and_malformed_lines():
+    from tools.make_report import _parse_prometheus_text
+
+    text = "\n".join([
+        "# HELP kvopt_hbm_used_gb HBM used",
+        "# TYPE kvopt_hbm_used_gb gauge",
+        "kvopt_hbm_used_gb 12.5",
+        'kvopt_requests_total{route="/metrics"} 3',
+        "kvopt_ttft_ms NaN",
+        "not a sample",
+        "",
+        "kvopt_p95_latency_ms 1.9e3",
+    ])
+    m = _parse_prometheus_text(text)
+
+    assert m["kvopt_hbm_used_gb"] == 12.5
+    assert m['kvopt_requests_total{route="/metrics"}'] == 3.0
+    assert m["kvopt_p95_latency_ms"] == 1900.0
+    assert m["kvopt_ttft_ms"] != m["kvopt_ttft_ms"]  # NaN
+    assert len(m) == 4
+
+
+def test_parse_prometheus_text_accepts_crlf_line_endings():
+    from tools.make_report import _parse_prometheus_text
+
+    assert _parse_prometheus_text("a 1\r\nb 2\r\n") == {"a": 1.0, "b": 2.0}
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_report_from_csv_with_partial_columns(tmp_path: Path, monkeypatch, engine):
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr("tools.make_report._CSV_ENGINE", engine)
+    csv = tmp_path/"metrics.csv"
+    pd.DataFrame({
+        "run": ["a", "b"],
+        "hbm_gb": [10.0, 8.0],
+        "p95_ms": [1500, 1400],
+    }).to_csv(csv, index=False)
+
+    out = tmp_path/"run_report.md"
+    generate_report("file", out, csv_path=csv)
+
+    text = out.read_text(encoding="utf-8")
+    assert "HBM before: 10.00 GB → after: 8.00 GB" in text
+    assert "Result: PASS" in text
+
+
+def test_report_from_two_working_directories(tmp_path: Path, monkeypatch):
+    csv = tmp_path/"metrics.csv"
+    pd.DataFrame({"hbm_gb": [2.0, 1.0], "p95_ms": [100, 90]}).to_csv(csv, index=False)
+
+    for name in ("a", "b"):
+        workdir = tmp_path/name
+        workdir.mkdir()
+        monkeypatch.chdir(workdir)
+        generate_report("file", workdir/"report.md", csv_path=csv)
+        assert (workdir/"outputs"/"charts"/"hbm.png").exists()
+
+
+def test_report_leaves_matplotlib_backend_alone(tmp_path: Path, monkeypatch):
+    import matplotlib
+    import matplotlib.pyplot as plt
+
+    csv = tmp_path/"metrics.csv"
+    pd.DataFrame({"hbm_gb": [2.0, 1.0], "ttft_s": [1.5, 1.0]}).to_csv(csv, index=False)
+    monkeypatch.chdir(tmp_path)
+    backend = matplotlib.get_backend()
+
+    generate_report("file", tmp_path/"report.md", csv_path=csv)
+
+    assert matplotlib.get_backend() == backend
+    assert plt.get_fignums() == []
+    assert (tmp_path/"outputs"/"charts"/"ttft.png").exists()
@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+
+from kvopt.server.main import app
+
+
+def test_submit_sequences_batch_reports_per_item_status():
+    with TestClient(app) as client:
+        payload = {
+            "sequences": [
+                {"sequence_id": "batch_seq_1", "length_tokens": 128},
+                {"sequence_id": "batch_seq_2", "length_tokens": 256},
+            ]
+        }
+        r = client.post("/sequences/batch", json=payload)
+        assert r.status_code == 200
+        results = r.json()["results"]
+        assert [item["sequence_id"] for item in results] == ["batch_seq_1", "batch_seq_2"]
+        assert all(item["accepted"] for item in results)
+
+        # Resubmitting an existing sequence is rejected per item, not for the whole batch
+        r = client.post("/sequences/batch", json={
+            "sequences": [
+                {"sequence_id": "batch_seq_1", "length_tokens": 128},
+                {"sequence_id": "batch_seq_3", "length_tokens": 64},
+            ]
+        })
+        assert r.status_code == 200
+        assert [item["accepted"] for item in r.json()["results"]] == [False, True]
+
+
+def test_submit_sequences_batch_validates_lengths():
+    with TestClient(app) as client:
+        r = client.post("/sequences/batch", json={
+            "sequences": [{"sequence_id": "bad", "length_tokens": 0}]
+        })
+        assert r.status_code == 422
@@ -1,19 +1,82 @@
 import argparse
+import importlib.util
 import os
+import re
 from pathlib import Path
-from typing import Optional, List, Dict
-import requests
-import pandas as pd
-import matplotlib.pyplot as plt
+from typing import Optional, Dict, TYPE_CHECKING
 import time
 
+# pandas, matplotlib and requests are imported where used so --help and argument
+# errors don't pay for loading them
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import requests
+
 DEF_CHART_DIR = Path("outputs/charts")
 # Backward-compatible alias used in plotting code
 CHART_DIR = DEF_CHART_DIR
 REPORT_PATH_DEFAULT = Path("outputs/run_report.md")
 
+# One sample per line: metric name (with optional labels) and a single value
+_PROM_RE = re.compile(
+    r"^([a-zA-Z_:][a-zA-Z0-9_:]*(?:\{[^}\n]*\})?)[ \t]+"
+    r"([-+]?(?:(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|Inf|NaN))[ \t\r]*$",
+    re.M,
+)
+
+_NAN = float("nan")
+# (report column, Prometheus metric) per live sample; ttft_s is converted from ms
+_METRIC_MAP = (
+    ("hbm_gb", "kvopt_hbm_used_gb"),
+    ("p95_ms", "kvopt_p95_latency_ms"),
+    ("ttft_s", "kvopt_ttft_ms"),
+    ("ddr_gb", "kvopt_ddr_used_gb"),
+    # counters
+    ("evicted", "kvopt_tokens_evicted_total"),
+    ("quantized", "kvopt_tokens_quantized_total"),
+    ("reuse_hits", "kvopt_reuse_hits_total"),
+    ("reuse_misses", "kvopt_reuse_misses_total"),
+    ("applies", "kvopt_autopilot_applies_total"),
+    ("rollbacks", "kvopt_autopilot_rollbacks_total"),
+)
+_COUNTER_COLUMNS = ("evicted", "quantized", "reuse_hits", "reuse_misses", "applies", "rollbacks")
+# File mode reads only the report columns, through pyarrow when it is installed
+_CSV_COLUMNS = [col for col, _ in _METRIC_MAP]
+_CSV_DTYPES = {col: "float64" for col in _CSV_COLUMNS}
+_CSV_ENGINE = "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+
+_REPORT_TEMPLATE = """# KV-OptKit Run Report
+## Summary
+HBM before: {hbm_gb_before:.2f} GB → after: {hbm_gb_after:.2f} GB
+DDR before: {ddr_gb_before:.2f} GB → after: {ddr_gb_after:.2f} GB
+P95 latency: {p95_before:.1f} ms → {p95_after:.1f} ms
+TTFT: {ttft_before:.2f} s → {ttft_after:.2f} s
+
+## Go/No-Go
+Result: {result} (threshold: P95 ≤ 2000 ms)
+
+## Action Counters (Δ over window)
+| Metric | Delta |
+|---|---:|
+| Tokens Evicted | {d_evicted:.0f} |
+| Tokens Quantized | {d_quantized:.0f} |
+| Reuse Hits | {d_reuse_hits:.0f} |
+| Reuse Misses | {d_reuse_misses:.0f} |
+| Autopilot Applies | {d_applies:.0f} |
+| Autopilot Rollbacks | {d_rollbacks:.0f} |
+
+## Charts
+![HBM trend](charts/hbm.png)
+![P95 latency](charts/latency.png)
+![TTFT](charts/ttft.png)
+![DDR trend](charts/ddr.png)
+"""
+
 
 def _ensure_dirs():
+    # Not memoized: the paths are relative to the cwd and outputs/ may be removed
+    # between reports, and exist_ok makes this one cheap syscall per directory
     DEF_CHART_DIR.mkdir(parents=True, exist_ok=True)
     REPORT_PATH_DEFAULT.parent.mkdir(parents=True, exist_ok=True)
 
@@ -24,125 +87,116 @@ def _write_md(out_path: Path, content: str):
 
 
 def _parse_prometheus_text(text: str) -> dict:
-    metrics = {}
-    for line in text.splitlines():
-        if line.startswith("#") or not line.strip():
-            continue
-        try:
-            k, v = line.split(None, 1)
-            metrics[k] = float(v.strip())
-        except Exception:
-            continue
-    return metrics
-
-
-def _sample_live_metrics(base_url: str, samples: int, interval_s: float) -> List[Dict[str, float]]:
-    rows: List[Dict[str, float]] = []
-    for i in range(max(1, samples)):
-        resp = requests.get(f"{base_url}/metrics", timeout=5)
-        resp.raise_for_status()
-        m = _parse_prometheus_text(resp.text)
-        rows.append({
-            "hbm_gb": m.get("kvopt_hbm_used_gb", float("nan")),
-            "p95_ms": m.get("kvopt_p95_latency_ms", float("nan")),
-            "ttft_s": (m.get("kvopt_ttft_ms", float("nan")) / 1000.0) if m.get("kvopt_ttft_ms") is not None else float("nan"),
-            "ddr_gb": m.get("kvopt_ddr_used_gb", float("nan")),
-            # counters
-            "evicted": m.get("kvopt_tokens_evicted_total", float("nan")),
-            "quantized": m.get("kvopt_tokens_quantized_total", float("nan")),
-            "reuse_hits": m.get("kvopt_reuse_hits_total", float("nan")),
-            "reuse_misses": m.get("kvopt_reuse_misses_total", float("nan")),
-            "applies": m.get("kvopt_autopilot_applies_total", float("nan")),
-            "rollbacks": m.get("kvopt_autopilot_rollbacks_total", float("nan")),
-        })
-        if i < samples - 1:
-            time.sleep(interval_s)
-    return rows
-
-
-def _summarize_before_after(df: pd.DataFrame):
-    mid = len(df) // 2 if len(df) > 1 else 1
-    before = df.iloc[:mid]
-    after = df.iloc[mid:]
-    summary = {
-        "hbm_gb_before": before["hbm_gb"].mean() if "hbm_gb" in df else float("nan"),
-        "hbm_gb_after": after["hbm_gb"].mean() if "hbm_gb" in df else float("nan"),
-        "ddr_gb_before": before["ddr_gb"].mean() if "ddr_gb" in df else float("nan"),
-        "ddr_gb_after": after["ddr_gb"].mean() if "ddr_gb" in df else float("nan"),
-        "p95_before": before["p95_ms"].mean() if "p95_ms" in df else float("nan"),
-        "p95_after": after["p95_ms"].mean() if "p95_ms" in df else float("nan"),
-        "ttft_before": before["ttft_s"].mean() if "ttft_s" in df else float("nan"),
-        "ttft_after": after["ttft_s"].mean() if "ttft_s" in df else float("nan"),
-    }
+    # Comments, blank and malformed lines simply don't match
+    return {m.group(1): float(m.group(2)) for m in _PROM_RE.finditer(text)}
+
+
+def _fetch_metrics_text(session: "requests.Session", base_url: str) -> str:
+    resp = session.get(f"{base_url}/metrics", timeout=5)
+    resp.raise_for_status()
+    return resp.text
+
+
+def _store_sample(cols: Dict[str, "np.ndarray"], i: int, text: str) -> None:
+    m = _parse_prometheus_text(text)
+    for col, metric in _METRIC_MAP:
+        cols[col][i] = m.get(metric, _NAN)
+
+
+def _sample_live_metrics(base_url: str, samples: int, interval_s: float,
+                         session: Optional["requests.Session"] = None) -> Dict[str, "np.ndarray"]:
+    """Poll /metrics and return one float64 column per report metric."""
+    if session is None:
+        import requests
+
+        # One keep-alive connection for every sample instead of a new one per request
+        with requests.Session() as session:
+            return _sample_live_metrics(base_url, samples, interval_s, session)
+
+    import numpy as np
+
+    n = max(1, samples)
+    # Fixed schema, so fill preallocated columns instead of building row dicts
+    cols = {col: np.empty(n, dtype=np.float64) for col, _ in _METRIC_MAP}
+    # Samples are taken one after another: the before/after split and counter deltas
+    # rely on sample i being observed before sample i + 1, even with --interval 0
+    next_at = time.monotonic()
+    for i in range(n):
+        _store_sample(cols, i, _fetch_metrics_text(session, base_url))
+        if i < samples - 1 and interval_s > 0:
+            # Sleep to the next tick so request and parse time count toward the interval
+            next_at += interval_s
+            time.sleep(max(0.0, next_at - time.monotonic()))
+    cols["ttft_s"] /= 1000.0  # NaN stays NaN
+    return cols
+
+
+def _summarize_before_after(df: "pd.DataFrame"):
+    mid = max(1, len(df) // 2)
+    # One reduction per half; columns missing from df come back as NaN
+    before = df.iloc[:mid].mean(numeric_only=True)
+    after = df.iloc[mid:].mean(numeric_only=True)
+    summary = {}
+    for col, key in (("hbm_gb", "hbm_gb"), ("ddr_gb", "ddr_gb"), ("p95_ms", "p95"), ("ttft_s", "ttft")):
+        summary[f"{key}_before"] = before.get(col, _NAN)
+        summary[f"{key}_after"] = after.get(col, _NAN)
     return summary
 
 
-def _plots(df: pd.DataFrame):
-    if "hbm_gb" in df:
-        plt.figure(); df["hbm_gb"].plot(title="HBM (GB)"); plt.ylabel("GB"); plt.tight_layout(); plt.savefig(CHART_DIR/"hbm.png"); plt.close()
-    if "p95_ms" in df:
-        plt.figure(); df["p95_ms"].plot(title="P95 Latency (ms)"); plt.ylabel("ms"); plt.tight_layout(); plt.savefig(CHART_DIR/"latency.png"); plt.close()
+def _plots(df: "pd.DataFrame"):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    # One figure/canvas reused for every chart; drawn on an explicit Agg canvas so the
+    # caller's pyplot backend is left untouched
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    for col, title, ylabel, name in (
+        ("hbm_gb", "HBM (GB)", "GB", "hbm"),
+        ("p95_ms", "P95 Latency (ms)", "ms", "latency"),
+        ("ddr_gb", "DDR (GB)", "GB", "ddr"),
+    ):
+        if col in df:
+            ax.clear(); df[col].plot(ax=ax, title=title); ax.set_ylabel(ylabel); fig.tight_layout(); fig.savefig(CHART_DIR/f"{name}.png")
     if "ttft_s" in df:
-        plt.figure(); df["ttft_s"].hist(); plt.title("TTFT (s)"); plt.xlabel("s"); plt.tight_layout(); plt.savefig(CHART_DIR/"ttft.png"); plt.close()
-    if "ddr_gb" in df:
-        plt.figure(); df["ddr_gb"].plot(title="DDR (GB)"); plt.ylabel("GB"); plt.tight_layout(); plt.savefig(CHART_DIR/"ddr.png"); plt.close()
+        ax.clear(); ax.hist(df["ttft_s"].dropna()); ax.grid(True); ax.set_title("TTFT (s)"); ax.set_xlabel("s"); fig.tight_layout(); fig.savefig(CHART_DIR/"ttft.png")
 
 
 def generate_report(source: str, out: Path, csv_path: Optional[Path] = None, base_url: str = "http://localhost:8000", samples: int = 2, interval_s: float = 1.0) -> Path:
+    import pandas as pd
+
     _ensure_dirs()
     df = None
     if source == "file":
         if not csv_path:
             raise ValueError("--from file requires --csv path")
-        df = pd.read_csv(csv_path)
+        # Read the header first and request only report columns that exist; engines
+        # differ in how they fail on missing usecols (ValueError vs ArrowKeyError)
+        header = set(pd.read_csv(csv_path, nrows=0).columns)
+        usecols = [col for col in _CSV_COLUMNS if col in header]
+        df = pd.read_csv(csv_path, usecols=usecols, dtype={col: _CSV_DTYPES[col] for col in usecols},
+                         engine=_CSV_ENGINE)
     elif source == "live":
-        rows = _sample_live_metrics(base_url, samples=samples, interval_s=interval_s)
-        df = pd.DataFrame(rows)
+        cols = _sample_live_metrics(base_url, samples=samples, interval_s=interval_s)
+        df = pd.DataFrame(cols, copy=False)
     else:
         raise ValueError("source must be 'live' or 'file'")
 
     _plots(df)
     s = _summarize_before_after(df)
 
-    # Counters delta table (if present)
-    def _delta(col: str) -> float:
-        return float(df[col].iloc[-1] - df[col].iloc[0]) if col in df and len(df[col]) >= 2 else float("nan")
-    deltas = {
-        "evicted": _delta("evicted"),
-        "quantized": _delta("quantized"),
-        "reuse_hits": _delta("reuse_hits"),
-        "reuse_misses": _delta("reuse_misses"),
-        "applies": _delta("applies"),
-        "rollbacks": _delta("rollbacks"),
-    }
+    # Counters delta table (if present); pull each column out once and index positionally
+    deltas = dict.fromkeys(_COUNTER_COLUMNS, _NAN)
+    if len(df) >= 2:
+        for col in _COUNTER_COLUMNS:
+            if col in df.columns:
+                arr = df[col].to_numpy()
+                deltas[col] = float(arr[-1] - arr[0])
 
     go = (s.get("p95_after", 1e9) <= 2000)
-    md = f"""# KV-OptKit Run Report
-## Summary
-HBM before: {s['hbm_gb_before']:.2f} GB → after: {s['hbm_gb_after']:.2f} GB
-DDR before: {s['ddr_gb_before']:.2f} GB → after: {s['ddr_gb_after']:.2f} GB
-P95 latency: {s['p95_before']:.1f} ms → {s['p95_after']:.1f} ms
-TTFT: {s['ttft_before']:.2f} s → {s['ttft_after']:.2f} s
-
-## Go/No-Go
-Result: {'PASS' if go else 'FAIL'} (threshold: P95 ≤ 2000 ms)
-
-## Action Counters (Δ over window)
-| Metric | Delta |
-|---|---:|
-| Tokens Evicted | {deltas['evicted']:.0f} |
-| Tokens Quantized | {deltas['quantized']:.0f} |
-| Reuse Hits | {deltas['reuse_hits']:.0f} |
-| Reuse Misses | {deltas['reuse_misses']:.0f} |
-| Autopilot Applies | {deltas['applies']:.0f} |
-| Autopilot Rollbacks | {deltas['rollbacks']:.0f} |
-
-## Charts
-![HBM trend](charts/hbm.png)
-![P95 latency](charts/latency.png)
-![TTFT](charts/ttft.png)
-![DDR trend](charts/ddr.png)
-"""
+    ctx = {**s, **{f"d_{k}": v for k, v in deltas.items()}, "result": "PASS" if go else "FAIL"}
+    md = _REPORT_TEMPLATE.format_map(ctx)
     _write_md(out, md)
     return out
 